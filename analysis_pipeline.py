@@ -0,0 +1,269 @@
+# analysis_pipeline.py
+"""
+One-call message analysis shared by the dashboard, the Telegram bot and
+offline jobs.
+
+Each message is normalized once and tokenized once: a single combined
+keyword match supplies the emotion fallback, reply context, intensity words
+and lead summary intents, instead of every helper lowercasing and rescanning
+the text on its own. Mood detection goes through the micro-batching server
+for single messages and through batched pipeline calls for lists and streams.
+
+Run ``python analysis_pipeline.py`` to check the results against the
+individual helpers and time both paths.
+"""
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from enhanced_mood_detector import (
+    _CONTEXT_MATCHER, _EMOTION_MATCHER, _INTENSITY_MATCHER, classify_intensity,
+)
+from keyword_matcher import KeywordMatcher
+from lead_utils import _SUMMARY_MATCHER, get_lead_warmth_score, suggest_next_action, summarize_intents
+from mood_cache import normalize_text
+from stage_timer import StageTimer
+
+# Every keyword list the stages need, matched in one pass per message
+_ANALYSIS_MATCHER = KeywordMatcher.combine({
+    "emotion": _EMOTION_MATCHER,
+    "context": _CONTEXT_MATCHER,
+    "intensity": _INTENSITY_MATCHER,
+    "summary": _SUMMARY_MATCHER,
+})
+
+STAGES = ["mood", "reply", "lead"]
+DEFAULT_CHUNK_SIZE = 64  # messages per batched mood call in iter_analyze
+
+
+class AnalysisResult(NamedTuple):
+    """Everything the UI, the bot and lead storage need about one message"""
+    message: str
+    mood: str
+    label: str
+    confidence: float
+    raw_scores: Dict[str, float]
+    served_by: str
+    mood_category: str
+    intensity: str
+    context: str
+    reply: str
+    lead_score: str
+    summary: str
+    next_action: str
+
+    def to_lead(self, timestamp: Optional[str] = None) -> Dict:
+        """The lead row stored in lead_data.csv and the session history"""
+        return {
+            "Timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "Message": self.message,
+            "Mood": self.mood,
+            "Mood Category": self.mood_category,
+            "Confidence": self.confidence,
+            "Intensity": self.intensity,
+            "Reply": self.reply,
+            "Lead Score": self.lead_score,
+            "Summary": self.summary,
+            "Suggested Action": self.next_action,
+        }
+
+
+class _Prepared(NamedTuple):
+    """A message after normalization and the shared keyword pass"""
+    message: str
+    text: str
+    hits: Dict
+
+
+class AnalysisPipeline:
+    """
+    Mood, category, intensity, reply, lead score and summary in one call.
+
+    Example:
+        pipeline = AnalysisPipeline(MoodDetector(), ReplyGenerator())
+        result = pipeline.analyze("The price is way too high!!")
+        result.reply, result.lead_score
+        for result in pipeline.iter_analyze(open("messages.txt")):
+            ...
+    """
+
+    def __init__(self, mood_detector, reply_generator, inference_server=None):
+        self.mood_detector = mood_detector
+        self.reply_generator = reply_generator
+        # Single messages are micro-batched with concurrent callers when a server is given
+        self.inference_server = inference_server
+
+    def _prepare(self, message: str) -> _Prepared:
+        text = normalize_text(message or "")
+        return _Prepared(message, text, _ANALYSIS_MATCHER.groups_for(_ANALYSIS_MATCHER.find_keywords(text)))
+
+    def _detect_one(self, prepared: _Prepared) -> Dict:
+        # The rule-based fallback reuses the emotion hits instead of rescanning
+        if prepared.text and self.mood_detector.emotion_pipeline is None:
+            return self.mood_detector._rule_based_detection(
+                prepared.text, KeywordMatcher.namespace(prepared.hits, "emotion"))
+        if self.inference_server is not None:
+            return self.inference_server.detect_mood(prepared.text)
+        return self.mood_detector.detect_mood(prepared.text)
+
+    def _finish(self, prepared: _Prepared, mood_result: Dict, timer: Optional[StageTimer] = None,
+                start: Optional[float] = None) -> AnalysisResult:
+        """Everything after mood detection, using the shared keyword hits"""
+        start = time.perf_counter() if start is None else start
+        hits = prepared.hits
+        mood_category = self.mood_detector.get_mood_category(mood_result["label"])
+        intensity = classify_intensity(prepared.text, len(hits.get("intensity:high", ())))
+        if timer is not None:
+            timer.record("mood", time.perf_counter() - start)
+            start = time.perf_counter()
+
+        context = next((group.split(":", 1)[1] for group in hits if group.startswith("context:")), "general")
+        if prepared.text:
+            reply = self.reply_generator.compose_reply(mood_category, intensity, context)
+        else:
+            reply = self.reply_generator.generate_reply("", mood_category, intensity)
+        if timer is not None:
+            timer.record("reply", time.perf_counter() - start)
+            start = time.perf_counter()
+
+        lead_score = get_lead_warmth_score(mood_category, intensity)
+        summary = summarize_intents(KeywordMatcher.namespace(hits, "summary"))
+        next_action = suggest_next_action(summary)
+        if timer is not None:
+            timer.record("lead", time.perf_counter() - start)
+
+        return AnalysisResult(
+            message=prepared.message,
+            mood=mood_result["mood"],
+            label=mood_result["label"],
+            confidence=mood_result["confidence"],
+            raw_scores=mood_result["raw_scores"],
+            served_by=mood_result.get("served_by", "unknown"),
+            mood_category=mood_category,
+            intensity=intensity,
+            context=context,
+            reply=reply,
+            lead_score=lead_score,
+            summary=summary,
+            next_action=next_action,
+        )
+
+    def analyze(self, message: str, timer: Optional[StageTimer] = None) -> AnalysisResult:
+        """
+        Analyze one message
+
+        Args:
+            message (str): Customer message as typed
+            timer (StageTimer): Optional timer; the "mood", "reply" and "lead"
+                stages are recorded on it as they finish (drives progress bars)
+
+        Returns:
+            AnalysisResult: The complete analysis
+        """
+        # The "mood" stage covers normalization and the shared keyword pass too
+        start = time.perf_counter()
+        prepared = self._prepare(message)
+        return self._finish(prepared, self._detect_one(prepared), timer, start)
+
+    def analyze_batch(self, messages: Iterable[str], batch_size: Optional[int] = None) -> List[AnalysisResult]:
+        """Analyze many messages with batched mood detection, in input order"""
+        return list(self.iter_analyze(messages, batch_size))
+
+    def iter_analyze(self, messages: Iterable[str], batch_size: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[AnalysisResult]:
+        """
+        Streaming analysis: reads ``chunk_size`` messages at a time and yields
+        results in input order, so arbitrarily long inputs use bounded memory
+        """
+        chunk: List[_Prepared] = []
+        for message in messages:
+            chunk.append(self._prepare(message))
+            if len(chunk) >= chunk_size:
+                yield from self._analyze_chunk(chunk, batch_size)
+                chunk = []
+        if chunk:
+            yield from self._analyze_chunk(chunk, batch_size)
+
+    def _analyze_chunk(self, chunk: List[_Prepared], batch_size: Optional[int]) -> Iterator[AnalysisResult]:
+        if self.mood_detector.emotion_pipeline is None:
+            mood_results = [self._detect_one(prepared) for prepared in chunk]
+        else:
+            mood_results = self.mood_detector.detect_mood_batch([p.text for p in chunk], batch_size)
+        for prepared, mood_result in zip(chunk, mood_results):
+            yield self._finish(prepared, mood_result)
+
+
+def _analyze_separately(detector, generator, message: str) -> AnalysisResult:
+    """The helper-by-helper path the pipeline replaces (parity and benchmark reference)"""
+    from keyword_matcher import Tokens
+    from lead_utils import generate_lead_summary
+
+    mood_result = detector.detect_mood(message)
+    mood_category = detector.get_mood_category(mood_result["label"])
+    tokens = Tokens.of(message)  # shared by the keyword helpers below
+    intensity = detector.analyze_sentiment_intensity(message, tokens)
+    context = generator._detect_context(tokens)
+    reply = generator.generate_reply(message, mood_category, intensity, tokens)
+    summary = generate_lead_summary(message, tokens)
+    return AnalysisResult(
+        message, mood_result["mood"], mood_result["label"], mood_result["confidence"],
+        mood_result["raw_scores"], mood_result.get("served_by", "unknown"), mood_category, intensity,
+        context if message.strip() else "general", reply, get_lead_warmth_score(mood_category, intensity),
+        summary, suggest_next_action(summary),
+    )
+
+
+def benchmark_analysis_pipeline(n_messages: int = 2000) -> bool:
+    """Check the pipeline matches the separate helpers, then time both"""
+    import random
+    from enhanced_mood_detector import MoodDetector, ReplyGenerator
+
+    detector = MoodDetector()
+    generator = ReplyGenerator()
+    pipeline = AnalysisPipeline(detector, generator)
+
+    samples = [
+        "Hi, what's the price of the premium plan?",
+        "The app keeps crashing and I'm REALLY frustrated!!",
+        "I am so excited, can we book a demo next week?",
+        "It's okay I guess, the service is fine.",
+        "Absolutely terrible experience, I'm very disappointed and upset.",
+        "Hello! Tell me more about this product feature",
+        "",
+    ]
+    rng = random.Random(3)
+    messages = [rng.choice(samples) + rng.choice(["", " Thanks.", " Any update?"]) for _ in range(n_messages)]
+
+    mismatches = [
+        message for message in samples + messages[:200]
+        if pipeline.analyze(message)[1:] != _analyze_separately(detector, generator, message)[1:]
+    ]
+
+    start = time.perf_counter()
+    for message in messages:
+        _analyze_separately(detector, generator, message)
+    separate_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for message in messages:
+        pipeline.analyze(message)
+    single_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    batch = pipeline.analyze_batch(messages)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Analysis pipeline benchmark ({n_messages:,} messages, mood served by {detector.served_by})")
+    print("=" * 60)
+    print(f"{'✅' if not mismatches else '❌'} results match the separate helpers"
+          + (f" (mismatches: {mismatches[:3]})" if mismatches else ""))
+    print(f"{'✅' if len(batch) == n_messages else '❌'} batch returns one result per message")
+    print(f"Separate helpers: {separate_ms / n_messages * 1000:.1f} µs/message")
+    print(f"Pipeline analyze: {single_ms / n_messages * 1000:.1f} µs/message")
+    print(f"Pipeline batch:   {batch_ms / n_messages * 1000:.1f} µs/message")
+    return not mismatches and len(batch) == n_messages
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if benchmark_analysis_pipeline() else 1)
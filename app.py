@@ -5,30 +5,65 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import json
-from gtts import gTTS
-import base64
-import time
 import numpy as np
+import os
 
-from enhanced_mood_detector import MoodDetector, ReplyGenerator
-from lead_utils import get_lead_warmth_score, generate_lead_summary, suggest_next_action, save_lead_to_csv
-from revenue_insights import compute_revenue_summary
+from model_registry import registry, get_mood_detector, get_reply_generator, get_inference_server, get_analysis_pipeline
+from lead_utils import save_lead_to_csv
+from lead_store import LeadStore
+from lead_records import LeadTable
+from revenue_insights import compute_revenue_summary, load_lead_frame, load_revenue_frame
+from tts_service import get_tts_service, audio_html
+from stage_timer import StageTimer, stage_stats
 
-from auth import hash_password, validate_user, save_user, user_exists
+from auth import hash_password, validate_user, create_user, user_exists, login_metrics, AuthThrottled
 import streamlit as st
 import re
 import webbrowser
 import threading
-from telegram_bot import start_bot
 from daily_trending_sales import render_daily_trending_section
 
+def _run_telegram_bot():
+    # Imported on the bot thread so python-telegram-bot stays off the first paint
+    from telegram_bot import start_bot
+    start_bot()
+
 @st.cache_resource
 def launch_telegram_bot():
-    bot_thread = threading.Thread(target=start_bot, daemon=True)
+    bot_thread = threading.Thread(target=_run_telegram_bot, daemon=True)
     bot_thread.start()
     return "Bot running"
 
-launch_telegram_bot()  # Run the bot when Streamlit starts
+@st.cache_resource
+def launch_background_services():
+    """Start the bot and model loading once per process, after the page has rendered"""
+    launch_telegram_bot()
+    get_mood_detector()  # returns at once; the model loads on a background thread
+    return "Background services started"
+
+@st.cache_data(show_spinner=False)
+def cached_lead_frame(csv_path: str, csv_size: int, csv_mtime: float):
+    """Raw lead rows for charts; re-parsed only when the CSV changes"""
+    return load_lead_frame(csv_path)
+
+def get_lead_frame(csv_path: str = "lead_data.csv"):
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        return pd.DataFrame()
+    return cached_lead_frame(csv_path, stat.st_size, stat.st_mtime)
+
+@st.cache_data(show_spinner=False)
+def cached_revenue_frame(csv_path: str, csv_size: int, csv_mtime: float, start):
+    """Chart columns from the columnar lead archive; reloaded only when the CSV changes"""
+    return load_revenue_frame(csv_path, start=start)
+
+def get_revenue_frame(csv_path: str = "lead_data.csv", start=None):
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        return pd.DataFrame()
+    return cached_revenue_frame(csv_path, stat.st_size, stat.st_mtime, start)
 
 
 
@@ -45,18 +80,13 @@ if "animations_enabled" not in st.session_state:
 def logout():
     """Handle user logout with smooth animation"""
     with st.spinner("Logging out..."):
-        time.sleep(1)
         st.session_state.logged_in = False
         st.session_state.username = ""
-        # Clear all session data
-        for key in ['chat_history', 'analytics_data', 'mood_detector', 'reply_generator']:
+        # Clear all session data (the lead store is recreated, shared, on the next run)
+        for key in ['chat_history', 'analytics_data', 'mood_detector', 'reply_generator', 'inference_server', 'analysis_pipeline']:
             if key in st.session_state:
-                if key in ['mood_detector', 'reply_generator']:
-                    del st.session_state[key]
-                else:
-                    st.session_state[key] = []
-    st.success("🚀 Logged out successfully!")
-    time.sleep(0.5)
+                del st.session_state[key]
+    st.toast("🚀 Logged out successfully!")
     st.rerun()
 
 def show_login():
@@ -109,16 +139,18 @@ def show_login():
                 passwd = st.text_input("Password", type="password", placeholder="Enter your password")
                 
                 if st.button("🚀 Login", type="primary", use_container_width=True):
-                    if validate_user(uname, passwd):
-                        with st.spinner("Authenticating..."):
-                            time.sleep(1)
-                            st.session_state.logged_in = True
-                            st.session_state.username = uname
-                            st.success(f"🎉 Welcome back, {uname}!")
-                            st.balloons()
-                            time.sleep(1)
-                            st.rerun()
-                    else:
+                    try:
+                        login_ok = validate_user(uname, passwd)
+                    except AuthThrottled as e:
+                        st.warning(f"⏳ {e}")
+                        login_ok = None
+                    if login_ok:
+                        st.session_state.logged_in = True
+                        st.session_state.username = uname
+                        # A toast survives the rerun, unlike st.success
+                        st.toast(f"🎉 Welcome back, {uname}!")
+                        st.rerun()
+                    elif login_ok is False:
                         st.error("❌ Invalid credentials. Please try again.")
 
             with tab2:
@@ -131,17 +163,20 @@ def show_login():
                         st.warning("⚠ Username already taken. Try another one!")
                     else:
                         with st.spinner("Creating your account..."):
-                            time.sleep(1)
                             hashed_pw = hash_password(new_passwd)
-                            save_user(new_uname, hashed_pw)
-                            st.success("🎊 Account created successfully! Please login.")
-                            st.balloons()
+                            if create_user(new_uname, hashed_pw):
+                                st.success("🎊 Account created successfully! Please login.")
+                                st.balloons()
+                            else:
+                                st.warning("⚠ Username already taken. Try another one!")
             
             st.markdown("</div>", unsafe_allow_html=True)
 
 # Check if user is logged in
 if not st.session_state.logged_in:
     show_login()
+    # The login page is already on its way to the browser; warm up behind it
+    launch_background_services()
     st.stop()
 
 # Page configuration
@@ -470,14 +505,22 @@ with col_nav4:
         logout()
 
 # Session Initialization
+# Models are loaded once per process and shared by every session and the bot
+launch_background_services()
 if 'mood_detector' not in st.session_state:
-    st.session_state.mood_detector = MoodDetector()
+    st.session_state.mood_detector = get_mood_detector()
 if 'reply_generator' not in st.session_state:
-    st.session_state.reply_generator = ReplyGenerator()
+    st.session_state.reply_generator = get_reply_generator()
+if 'inference_server' not in st.session_state:
+    st.session_state.inference_server = get_inference_server()
+if 'analysis_pipeline' not in st.session_state:
+    st.session_state.analysis_pipeline = get_analysis_pipeline()
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    # Compact columnar store: low-cardinality fields are kept as small codes
+    st.session_state.chat_history = LeadTable()
 if 'analytics_data' not in st.session_state:
-    st.session_state.analytics_data = []
+    # The same store as chat_history, so each lead is held once
+    st.session_state.analytics_data = st.session_state.chat_history
 
 # Enhanced Sidebar with modern design
 st.sidebar.markdown("""
@@ -507,9 +550,9 @@ if show_daily_trends:
 if st.session_state.analytics_data:
     st.sidebar.markdown("### 📊 Live Statistics")
     total = len(st.session_state.analytics_data)
-    moods = [item['Mood Category'] for item in st.session_state.analytics_data]
+    moods = st.session_state.analytics_data.column('Mood Category')
     common_mood = max(set(moods), key=moods.count) if moods else "N/A"
-    confidences = [item['Confidence'] for item in st.session_state.analytics_data]
+    confidences = st.session_state.analytics_data.column('Confidence')
     avg_conf = sum(confidences) / len(confidences) if confidences else 0
     
     # Animated metric cards
@@ -534,6 +577,37 @@ if st.session_state.analytics_data:
     </div>
     """, unsafe_allow_html=True)
 
+# Shared model status
+with st.sidebar.expander("🧠 Model Status", expanded=False):
+    if not st.session_state.mood_detector.ready.is_set():
+        st.info("⏳ AI model loading in the background; using fast rule-based analysis meanwhile.")
+    st.caption(f"Serving: {st.session_state.mood_detector.served_by}")
+    model_stats = registry.stats()
+    for model_key, info in model_stats["models"].items():
+        st.markdown(f"**{model_key}**: {info['load_seconds']}s load, +{info['memory_mb']} MB")
+    st.caption(f"Process memory: {model_stats['process_rss_mb']} MB")
+    auth_stats = login_metrics()
+    st.caption(
+        f"Logins: {auth_stats['logins_per_sec']}/s | "
+        f"bcrypt queue wait avg {auth_stats['avg_queue_wait_ms']} ms, p99 {auth_stats['p99_queue_wait_ms']} ms"
+    )
+    cache_stats = st.session_state.mood_detector.cache.stats()
+    st.caption(
+        f"Mood cache: {cache_stats['hit_rate']:.0%} hit rate | "
+        f"{cache_stats['entries']} entries, {cache_stats['bytes'] / 1024:.0f} KB"
+    )
+    analyze_stats = stage_stats("analyze")
+    if analyze_stats:
+        st.caption("Analyze stages (p50/p99): " + " | ".join(
+            f"{stage} {row['p50_ms']}/{row['p99_ms']} ms" for stage, row in analyze_stats.items()
+        ))
+    server_stats = st.session_state.inference_server.stats()
+    st.caption(
+        f"Inference queue: {server_stats['queue_depth']} waiting | "
+        f"fill {server_stats['batch_fill_ratio']:.0%} | "
+        f"p50 {server_stats['p50_latency_ms']} ms | p99 {server_stats['p99_latency_ms']} ms"
+    )
+
 # Telegram Integration
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 💬 Telegram Integration")
@@ -633,43 +707,43 @@ with col_btn2:
             progress = st.progress(0)
             status = st.empty()
             
-            # Step 1: Mood Detection
-            status.markdown("🔍 *Step 1:* Analyzing customer emotions...")
-            progress.progress(20)
-            time.sleep(0.8)
+            # Progress advances when each stage actually finishes
+            stage_labels = {
+                "mood": "🔍 *Step 1:* Analyzing customer emotions...",
+                "reply": "💬 *Step 2:* Generating intelligent reply...",
+                "lead": "📊 *Step 3:* Computing lead analysis...",
+            }
+            stage_order = list(stage_labels)
+            
+            def show_stage_done(stage, seconds, completed, total):
+                progress.progress(completed / total)
+                if completed < total:
+                    status.markdown(stage_labels[stage_order[completed]])
+            
+            timer = StageTimer("analyze", stage_order, on_stage_done=show_stage_done)
+            status.markdown(stage_labels["mood"])
             
             try:
-                mood_result = st.session_state.mood_detector.detect_mood(user_input)
-                mood = mood_result['mood']
-                confidence = mood_result['confidence']
-                raw_scores = mood_result['raw_scores']
-                label = mood_result['label']
-                mood_category = st.session_state.mood_detector.get_mood_category(label)
-                intensity = st.session_state.mood_detector.analyze_sentiment_intensity(user_input)
-                
-                # Step 2: Reply Generation
-                status.markdown("💬 *Step 2:* Generating intelligent reply...")
-                progress.progress(50)
-                time.sleep(0.8)
+                model_ready = st.session_state.mood_detector.ready.is_set()
+                # One call: text is normalized and keyword-matched once for all stages
+                result = st.session_state.analysis_pipeline.analyze(user_input, timer=timer)
+                mood = result.mood
+                confidence = result.confidence
+                raw_scores = result.raw_scores
+                mood_category = result.mood_category
+                intensity = result.intensity
+                reply = result.reply
+                lead_score = result.lead_score
+                summary = result.summary
+                next_action = result.next_action
                 
-                reply = st.session_state.reply_generator.generate_reply(user_input, mood_category, intensity)
-                
-                # Step 3: Lead Analysis
-                status.markdown("📊 *Step 3:* Computing lead analysis...")
-                progress.progress(80)
-                time.sleep(0.8)
-                
-                lead_score = get_lead_warmth_score(mood_category, intensity)
-                summary = generate_lead_summary(user_input)
-                next_action = suggest_next_action(summary)
-                
-                progress.progress(100)
-                status.markdown("✅ *Analysis Complete!* Results ready below.")
-                
-                # Clear progress after delay
-                time.sleep(1)
+                timer.log()
                 progress.empty()
-                status.empty()
+                status.markdown("✅ *Analysis Complete!* Results ready below.")
+                served_by = result.served_by
+                if not model_ready:
+                    served_by += " (the AI model is still loading)"
+                st.caption(f"🧠 Mood served by {served_by} | ⏱️ {timer.summary()}")
                 
                 # Enhanced Alert System
                 mood_text = re.sub(r'[^\w\s]', '', mood).lower().strip()
@@ -696,18 +770,7 @@ with col_btn2:
                     """, unsafe_allow_html=True)
                 
                 # Save lead data
-                lead = {
-                    "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Message": user_input,
-                    "Mood": mood,
-                    "Mood Category": mood_category,
-                    "Confidence": confidence,
-                    "Intensity": intensity,
-                    "Reply": reply,
-                    "Lead Score": lead_score,
-                    "Summary": summary,
-                    "Suggested Action": next_action
-                }
+                lead = result.to_lead()
                 save_lead_to_csv(lead)
                 
                 # Enhanced Results Display
@@ -774,23 +837,13 @@ with col_btn2:
                 if auto_speak:
                     tts_text = f"Customer mood detected as {mood} with {confidence}% confidence. {reply}"
                     try:
-                        tts = gTTS(tts_text)
-                        tts.save("analysis_result.mp3")
-                        
-                        with open("analysis_result.mp3", "rb") as f:
-                            audio_bytes = f.read()
-                            b64 = base64.b64encode(audio_bytes).decode()
-                            st.markdown(f"""
-                            <audio controls autoplay>
-                                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-                            </audio>
-                            """, unsafe_allow_html=True)
+                        audio_bytes = get_tts_service().synthesize(tts_text)
+                        st.markdown(audio_html(audio_bytes), unsafe_allow_html=True)
                     except Exception as e:
                         st.warning(f"🔊 Audio generation failed: {e}")
                 
                 # Update session data
-                st.session_state.chat_history.append(lead)
-                st.session_state.analytics_data.append(lead)
+                st.session_state.chat_history.append(lead)  # analytics_data shares this store
                 
                 # Success animation
                 if st.session_state.animations_enabled:
@@ -814,7 +867,7 @@ if show_analytics and st.session_state.analytics_data:
     
     # Revenue Analysis Section
     with st.expander("💰 Revenue Impact Analysis", expanded=True):
-        revenue_data = compute_revenue_summary()
+        revenue_data = compute_revenue_summary(include_dataframe=False)
         
         # Key metrics in a beautiful grid
         metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
@@ -892,30 +945,27 @@ if show_analytics and st.session_state.analytics_data:
             if st.button("🔊 Play AI Summary", use_container_width=True):
                 try:
                     with st.spinner("🎙 Generating voice summary..."):
-                        tts = gTTS(summary_text)
-                        tts.save("dashboard_summary.mp3")
-                        
-                        with open("dashboard_summary.mp3", "rb") as f:
-                            audio_bytes = f.read()
-                            b64 = base64.b64encode(audio_bytes).decode()
-                            st.markdown(f"""
-                            <audio controls autoplay>
-                                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-                            </audio>
-                            """, unsafe_allow_html=True)
+                        # Synthesized in memory and cached by text hash, so unchanged
+                        # summaries play instantly and sessions never share a file
+                        audio_bytes = get_tts_service().synthesize(summary_text)
+                        st.markdown(audio_html(audio_bytes), unsafe_allow_html=True)
                         st.success("🎵 Voice summary ready!")
                 except Exception as e:
                     st.error(f"🔊 Voice generation failed: {e}")
         
-        # Enhanced Visualizations
-        df_plot = revenue_data['dataframe']
+        # Enhanced Visualizations (only timestamp and lead type are loaded for the charts)
+        chart_periods = {"All time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
+        chart_period = st.selectbox("📅 Chart period", list(chart_periods), key="chart_period")
+        period_days = chart_periods[chart_period]
+        period_start = (datetime.now() - pd.Timedelta(days=period_days)).strftime("%Y-%m-%d") if period_days else None
+        df_plot = get_revenue_frame(start=period_start)
         
         if not df_plot.empty:
             chart_col1, chart_col2 = st.columns(2)
             
             with chart_col1:
                 # 3D Revenue Chart
-                revenue_by_type = df_plot.groupby("lead_type")["estimated_revenue"].sum().reset_index()
+                revenue_by_type = df_plot.groupby("lead_type", observed=True)["estimated_revenue"].sum().reset_index()
                 revenue_by_type["lead_type"] = revenue_by_type["lead_type"].str.title()
                 
                 fig_3d = px.bar(
@@ -962,9 +1012,6 @@ if show_analytics and st.session_state.analytics_data:
             
             # Time Series Analysis
             if len(df_plot) > 1:
-                df_plot['timestamp'] = pd.to_datetime(df_plot['Timestamp'])
-                df_plot = df_plot.sort_values('timestamp')
-                
                 fig_timeline = px.line(
                     df_plot, 
                     x='timestamp', 
@@ -981,50 +1028,51 @@ if show_analytics and st.session_state.analytics_data:
                 )
                 st.plotly_chart(fig_timeline, use_container_width=True)
             
-            # Interactive Revenue Editor
+            # Interactive Revenue Editor (needs the full rows, so they are loaded only on request)
             st.markdown("### ✏ Revenue Adjustment Center")
-            with st.form("revenue_edit_form"):
-                st.markdown("""
-                <div class="glass-card">
-                    <h4 style="color: var(--text-color); margin-bottom: 1rem;">💰 Adjust Revenue Estimates</h4>
-                    <p style="color: rgba(255,255,255,0.8); margin-bottom: 1rem;">
-                        Fine-tune your revenue projections based on real-world insights
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
+            if st.checkbox("Open the revenue editor", key="open_revenue_editor"):
+                df_leads = get_lead_frame()
+                with st.form("revenue_edit_form"):
+                    st.markdown("""
+                    <div class="glass-card">
+                        <h4 style="color: var(--text-color); margin-bottom: 1rem;">💰 Adjust Revenue Estimates</h4>
+                        <p style="color: rgba(255,255,255,0.8); margin-bottom: 1rem;">
+                            Fine-tune your revenue projections based on real-world insights
+                        </p>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                editable_df = df_plot[["Timestamp", "Message", "Lead Score", "estimated_revenue"]].copy()
-                editable_df = editable_df.rename(columns={"estimated_revenue": "Revenue (₹)"})
+                    editable_df = df_leads[["Timestamp", "Message", "Lead Score", "estimated_revenue"]].copy()
+                    editable_df = editable_df.rename(columns={"estimated_revenue": "Revenue (₹)"})
                 
-                edited_df = st.data_editor(
-                    editable_df, 
-                    num_rows="dynamic", 
-                    use_container_width=True,
-                    key="editable_revenue",
-                    column_config={
-                        "Revenue (₹)": st.column_config.NumberColumn(
-                            "Revenue (₹)",
-                            help="Adjust the revenue estimate",
-                            min_value=0,
-                            max_value=1000000,
-                            step=1000,
-                            format="₹%d"
-                        )
-                    }
-                )
+                    edited_df = st.data_editor(
+                        editable_df, 
+                        num_rows="dynamic", 
+                        use_container_width=True,
+                        key="editable_revenue",
+                        column_config={
+                            "Revenue (₹)": st.column_config.NumberColumn(
+                                "Revenue (₹)",
+                                help="Adjust the revenue estimate",
+                                min_value=0,
+                                max_value=1000000,
+                                step=1000,
+                                format="₹%d"
+                            )
+                        }
+                    )
                 
-                save_col1, save_col2 = st.columns([3, 1])
-                with save_col2:
-                    submitted = st.form_submit_button("💾 Save Changes", type="primary", use_container_width=True)
+                    save_col1, save_col2 = st.columns([3, 1])
+                    with save_col2:
+                        submitted = st.form_submit_button("💾 Save Changes", type="primary", use_container_width=True)
                 
-                if submitted:
-                    with st.spinner("💾 Saving revenue adjustments..."):
-                        for idx, row in edited_df.iterrows():
-                            df_plot.at[idx, "estimated_revenue"] = row["Revenue (₹)"]
-                        df_plot.to_csv("lead_data.csv", index=False)
-                        time.sleep(1)
-                        st.success("✅ Revenue estimates updated successfully!")
-                        st.balloons()
+                    if submitted:
+                        with st.spinner("💾 Saving revenue adjustments..."):
+                            for idx, row in edited_df.iterrows():
+                                df_leads.at[idx, "estimated_revenue"] = row["Revenue (₹)"]
+                            LeadStore("lead_data.csv").rewrite(df_leads.to_dict("records"))
+                            st.success("✅ Revenue estimates updated successfully!")
+                            st.balloons()
         else:
             st.markdown("""
             <div class="glass-card">
@@ -1053,7 +1101,7 @@ if show_history and st.session_state.chat_history:
         st.markdown("### 📥 Export Options")
     
     with export_col2:
-        json_data = json.dumps(st.session_state.chat_history, indent=2)
+        json_data = json.dumps(st.session_state.chat_history.to_dicts(), indent=2)
         st.download_button(
             "📊 Download JSON",
             data=json_data,
@@ -1063,7 +1111,7 @@ if show_history and st.session_state.chat_history:
     
     with export_col3:
         if st.session_state.chat_history:
-            csv_data = pd.DataFrame(st.session_state.chat_history).to_csv(index=False)
+            csv_data = st.session_state.chat_history.to_frame().to_csv(index=False)
             st.download_button(
                 "📋 Download CSV",
                 data=csv_data,
@@ -1078,14 +1126,14 @@ if show_history and st.session_state.chat_history:
     with filter_col1:
         mood_filter = st.selectbox(
             "Filter by Mood Category",
-            ["All"] + list(set([item['Mood Category'] for item in st.session_state.chat_history])),
+            ["All"] + st.session_state.chat_history.distinct('Mood Category'),
             key="mood_filter"
         )
     
     with filter_col2:
         intensity_filter = st.selectbox(
             "Filter by Intensity",
-            ["All"] + list(set([item['Intensity'] for item in st.session_state.chat_history])),
+            ["All"] + st.session_state.chat_history.distinct('Intensity'),
             key="intensity_filter"
         )
     
@@ -1097,7 +1145,7 @@ if show_history and st.session_state.chat_history:
         )
     
     # Apply filters
-    filtered_history = st.session_state.chat_history.copy()
+    filtered_history = list(st.session_state.chat_history)
     
     if mood_filter != "All":
         filtered_history = [item for item in filtered_history if item['Mood Category'] == mood_filter]
@@ -1154,15 +1202,14 @@ action_col1, action_col2, action_col3, action_col4 = st.columns(4)
 
 with action_col1:
     if st.button("🗑 Clear History", use_container_width=True):
-        st.session_state.chat_history.clear()
-        st.session_state.analytics_data.clear()
+        st.session_state.chat_history.clear()  # also empties analytics_data (same store)
         st.success("🧹 History cleared!")
         st.rerun()
 
 with action_col2:
     if st.button("📊 Export Analytics", use_container_width=True):
         if st.session_state.analytics_data:
-            df = pd.DataFrame(st.session_state.analytics_data)
+            df = st.session_state.analytics_data.to_frame()
             csv = df.to_csv(index=False)
             st.download_button(
                 "📥 Download Analytics",
@@ -1,38 +1,215 @@
 import bcrypt
+import csv
 import pandas as pd
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from file_lock import atomic_replace, file_lock
 
 USER_CSV = "users.csv"
 
+# Password hashing settings; changing BCRYPT_ROUNDS upgrades hashes on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", str(min(4, os.cpu_count() or 1))))
+AUTH_MAX_PENDING = int(os.getenv("AUTH_MAX_PENDING", "32"))  # verifications queued or running
+LOGIN_ATTEMPTS_PER_MINUTE = int(os.getenv("LOGIN_ATTEMPTS_PER_MINUTE", "5"))  # per username
+LOGIN_WINDOW = 60  # seconds
+LOGIN_TRACKED_USERS = 10000  # usernames with recent attempts before stale ones are swept
+METRICS_WINDOW = 60  # seconds
+
+
+class AuthThrottled(Exception):
+    """Raised when a login is refused by rate limiting or a full verification queue"""
+
+
+# bcrypt releases the GIL, so a thread pool runs hashes in parallel
+# without blocking the Streamlit script threads
+_verify_pool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="bcrypt")
+_pending_slots = threading.BoundedSemaphore(AUTH_MAX_PENDING)
+_login_attempts = {}  # username -> deque of attempt times within LOGIN_WINDOW
+_login_attempts_lock = threading.Lock()
+_verify_log = deque(maxlen=10000)  # (finished_at, queue_wait_seconds)
+
+# username -> bcrypt hash, re-read only when users.csv changes on disk
+_user_cache = {"file_key": None, "users": {}}
+_user_cache_lock = threading.Lock()
+
+
+def _file_key():
+    try:
+        stat = os.stat(USER_CSV)
+    except FileNotFoundError:
+        return None
+    return (os.path.abspath(USER_CSV), stat.st_mtime_ns, stat.st_size)
+
+
+def _read_user_file():
+    users = {}
+    try:
+        with open(USER_CSV, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                # Keep the first entry for a username, like the old DataFrame lookup
+                users.setdefault(row["username"], row["password"])
+    except FileNotFoundError:
+        pass
+    return users
+
+
+def get_user_index():
+    """Return the cached {username: hashed password} dict for USER_CSV"""
+    file_key = _file_key()
+    if _user_cache["file_key"] == file_key and file_key is not None:
+        return _user_cache["users"]
+    with _user_cache_lock:
+        file_key = _file_key()
+        if _user_cache["file_key"] != file_key or file_key is None:
+            _user_cache["users"] = _read_user_file()
+            _user_cache["file_key"] = file_key
+        return _user_cache["users"]
+
+
 def load_users():
-    if os.path.exists(USER_CSV):
-        try:
-            return pd.read_csv(USER_CSV)
-        except pd.errors.EmptyDataError:
-            return pd.DataFrame(columns=["username", "password"])
-    else:
-        return pd.DataFrame(columns=["username", "password"])
+    users = get_user_index()
+    return pd.DataFrame(list(users.items()), columns=["username", "password"])
+
+
+def _append_user(username, hashed_pw):
+    """Append one row to USER_CSV (caller holds the file lock)"""
+    new_file = not os.path.exists(USER_CSV) or os.path.getsize(USER_CSV) == 0
+    with open(USER_CSV, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if new_file:
+            writer.writerow(["username", "password"])
+        writer.writerow([username, hashed_pw])
+
+    # Update the index in place instead of re-parsing the file
+    with _user_cache_lock:
+        _user_cache["users"].setdefault(username, hashed_pw)
+        _user_cache["file_key"] = _file_key()
 
 
 def save_user(username, hashed_pw):
-    df = load_users()
-    new_user = pd.DataFrame([[username, hashed_pw]], columns=["username", "password"])
-    df = pd.concat([df, new_user], ignore_index=True)
-    df.to_csv(USER_CSV, index=False)
+    with file_lock(USER_CSV):
+        get_user_index()  # make sure the cache reflects the file before appending
+        _append_user(username, hashed_pw)
+
+
+def create_user(username, hashed_pw):
+    """Atomically register a user; returns False if the username is taken"""
+    with file_lock(USER_CSV):
+        if username in get_user_index():
+            return False
+        _append_user(username, hashed_pw)
+        return True
 
-def hash_password(password):
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+def hash_password(password, rounds=None):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode()
 
 def check_password(password, hashed):
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
+def needs_rehash(hashed):
+    """True if the hash was made with a different cost factor than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+def verify_password(password, hashed):
+    """Run check_password on the bcrypt worker pool, refusing work when it is full"""
+    if not _pending_slots.acquire(blocking=False):
+        raise AuthThrottled("Too many logins in progress. Please try again in a moment.")
+    submitted_at = time.perf_counter()
+
+    def task():
+        queue_wait = time.perf_counter() - submitted_at
+        result = check_password(password, hashed)
+        _verify_log.append((time.time(), queue_wait))
+        return result
+
+    try:
+        return _verify_pool.submit(task).result()
+    finally:
+        _pending_slots.release()
+
+def _sweep_login_attempts(now):
+    """Forget usernames whose attempts all fell out of the window (caller holds the lock)"""
+    stale = [name for name, attempts in _login_attempts.items() if now - attempts[-1] > LOGIN_WINDOW]
+    for name in stale:
+        del _login_attempts[name]
+    # Still full within one window: drop the usernames first seen longest ago
+    while len(_login_attempts) >= LOGIN_TRACKED_USERS:
+        del _login_attempts[next(iter(_login_attempts))]
+
+def _check_rate_limit(username):
+    now = time.time()
+    with _login_attempts_lock:
+        attempts = _login_attempts.get(username)
+        if attempts is None:
+            # Bound the table: every distinct username tried would otherwise stay forever
+            if len(_login_attempts) >= LOGIN_TRACKED_USERS:
+                _sweep_login_attempts(now)
+            attempts = _login_attempts[username] = deque()
+        while attempts and now - attempts[0] > LOGIN_WINDOW:
+            attempts.popleft()
+        if len(attempts) >= LOGIN_ATTEMPTS_PER_MINUTE:
+            raise AuthThrottled("Too many login attempts. Please wait a minute and try again.")
+        attempts.append(now)
+
+def _rehash_user(username, password):
+    """Store a hash with the current cost factor (runs on the worker pool)"""
+    new_hash = hash_password(password)
+    with file_lock(USER_CSV):
+        with open(USER_CSV, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        replaced = False
+        for row in rows[1:]:
+            if not replaced and row and row[0] == username:
+                row[1] = new_hash
+                replaced = True
+        if not replaced:
+            return
+        with atomic_replace(USER_CSV) as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
+        with _user_cache_lock:
+            _user_cache["users"][username] = new_hash
+            _user_cache["file_key"] = _file_key()
+
 def user_exists(username):
-    df = load_users()
-    return username in df["username"].values
+    return username in get_user_index()
 
 def validate_user(username, password):
-    df = load_users()
-    user_row = df[df["username"] == username]
-    if user_row.empty:
+    """
+    Check a login against users.csv.
+
+    Raises:
+        AuthThrottled: if the user exceeded LOGIN_ATTEMPTS_PER_MINUTE or the
+            verification queue is full.
+    """
+    _check_rate_limit(username)
+    hashed = get_user_index().get(username)
+    if hashed is None:
         return False
-    return check_password(password, user_row.iloc[0]["password"])
+    valid = verify_password(password, hashed)
+    if valid:
+        with _login_attempts_lock:
+            _login_attempts.pop(username, None)
+        if needs_rehash(hashed):
+            _verify_pool.submit(_rehash_user, username, password)
+    return valid
+
+def login_metrics():
+    """Logins/sec and bcrypt queue wait over the last METRICS_WINDOW seconds"""
+    now = time.time()
+    recent = [wait for finished_at, wait in list(_verify_log) if now - finished_at <= METRICS_WINDOW]
+    waits = sorted(recent) or [0.0]
+    return {
+        "logins_per_sec": round(len(recent) / METRICS_WINDOW, 2),
+        "avg_queue_wait_ms": round(sum(waits) / len(waits) * 1000, 1),
+        "p99_queue_wait_ms": round(waits[min(int(len(waits) * 0.99), len(waits) - 1)] * 1000, 1),
+        "workers": AUTH_WORKERS,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
@@ -0,0 +1,101 @@
+# bot_load_test.py
+"""
+Load-test harness for the Telegram reply handler.
+
+Feeds N simulated concurrent chats through telegram_bot.reply using fake
+Update objects (no network access or bot token needed) and reports
+throughput, reply latency and how responsive the event loop stayed.
+
+Usage:
+    python bot_load_test.py --chats 50 --messages 10
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import telegram_bot
+from model_registry import get_inference_server, get_mood_detector
+
+SAMPLE_MESSAGES = [
+    "Hi! Can you tell me about your pricing plans?",
+    "This is absolutely terrible service, I'm furious right now!!!",
+    "I'm really excited about your new product launch!",
+    "The app keeps crashing after the update, please help",
+    "Could we schedule a demo for my team next week?",
+]
+
+
+class FakeMessage:
+    """Stands in for telegram.Message; records replies instead of sending them"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text: str):
+        self.replies.append(text)
+
+
+def fake_update(chat_id: int, text: str):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id), message=FakeMessage(text))
+
+
+async def _simulate_chat(chat_id: int, n_messages: int, latencies: list, replies: list):
+    for i in range(n_messages):
+        update = fake_update(chat_id, SAMPLE_MESSAGES[(chat_id + i) % len(SAMPLE_MESSAGES)])
+        start = time.perf_counter()
+        await telegram_bot.reply(update, None)
+        latencies.append(time.perf_counter() - start)
+        replies.extend(update.message.replies)
+
+
+async def _watch_event_loop(stop: asyncio.Event, lags: list, interval: float = 0.01):
+    """Measure how late the loop wakes us up; large values mean it was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_load_test(chats: int, messages_per_chat: int) -> dict:
+    latencies, replies, lags = [], [], []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_event_loop(stop, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _simulate_chat(chat_id, messages_per_chat, latencies, replies) for chat_id in range(chats)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await watcher
+
+    latencies.sort()
+    total = chats * messages_per_chat
+    return {
+        "messages": total,
+        "seconds": round(elapsed, 2),
+        "messages_per_sec": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_latency_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_latency_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+        "busy_replies": sum(1 for r in replies if r == telegram_bot.BUSY_MESSAGE),
+        "max_loop_lag_ms": round(max(lags, default=0.0) * 1000, 1),
+        "inference": get_inference_server().stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Telegram reply handler")
+    parser.add_argument("--chats", type=int, default=50, help="Number of concurrent chats")
+    parser.add_argument("--messages", type=int, default=10, help="Messages sent per chat")
+    args = parser.parse_args()
+
+    # Measure the model path, not the rule-based answers served while it loads
+    get_mood_detector().wait_until_ready()
+    report = asyncio.run(run_load_test(args.chats, args.messages))
+    print("Telegram bot load test")
+    print("=" * 60)
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,118 @@
+# conversation_store.py
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional
+
+
+class ConversationStore:
+    """
+    Bounded per-chat conversation memory for the Telegram bot.
+
+    Each chat keeps a fixed-size ring buffer of its last ``max_history``
+    messages. At most ``max_chats`` chats are held in RAM; the least recently
+    active one is evicted first, and chats idle for longer than
+    ``ttl_seconds`` are dropped. With ``sqlite_path`` set, messages are also
+    written to a local SQLite file so evicted chats and restarts can reload
+    their history on demand.
+    """
+
+    def __init__(self, max_chats: int = 10000, max_history: int = 5,
+                 ttl_seconds: float = 24 * 3600, sqlite_path: Optional[str] = None):
+        self.max_chats = max_chats
+        self.max_history = max_history
+        self.ttl_seconds = ttl_seconds
+        # chat_id -> (deque of messages, last activity time), oldest first
+        self._chats: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "chat_id INTEGER NOT NULL, ts REAL NOT NULL, text TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages (chat_id, ts)")
+            self._db.commit()
+
+    def append(self, chat_id: int, text: str) -> List[str]:
+        """Add a message to a chat and return the chat's recent history"""
+        now = time.time()
+        with self._lock:
+            history = self._load(chat_id, now)
+            history.append(text)
+            self._chats[chat_id] = (history, now)
+            self._chats.move_to_end(chat_id)
+            self._evict(now)
+            if self._db is not None:
+                self._persist(chat_id, now, text)
+            return list(history)
+
+    def get(self, chat_id: int) -> List[str]:
+        """Return a chat's recent history (oldest message first)"""
+        now = time.time()
+        with self._lock:
+            entry = self._chats.get(chat_id)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                return list(entry[0])
+            if self._db is not None:
+                return list(self._load_from_db(chat_id, now))
+            return []
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._chats
+
+    def evict_expired(self) -> int:
+        """Drop every chat idle for longer than ttl_seconds; returns how many"""
+        now = time.time()
+        with self._lock:
+            before = len(self._chats)
+            self._evict(now)
+            if self._db is not None:
+                self._db.execute("DELETE FROM messages WHERE ts < ?", (now - self.ttl_seconds,))
+                self._db.commit()
+            return before - len(self._chats)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _load(self, chat_id: int, now: float) -> deque:
+        entry = self._chats.get(chat_id)
+        if entry is not None and now - entry[1] <= self.ttl_seconds:
+            return entry[0]
+        if self._db is not None:
+            return self._load_from_db(chat_id, now)
+        return deque(maxlen=self.max_history)
+
+    def _load_from_db(self, chat_id: int, now: float) -> deque:
+        rows = self._db.execute(
+            "SELECT text FROM messages WHERE chat_id = ? AND ts >= ? ORDER BY ts DESC LIMIT ?",
+            (chat_id, now - self.ttl_seconds, self.max_history),
+        ).fetchall()
+        return deque((row[0] for row in reversed(rows)), maxlen=self.max_history)
+
+    def _evict(self, now: float):
+        # LRU order means expired chats are always at the front
+        while self._chats:
+            _, last_seen = next(iter(self._chats.values()))
+            if len(self._chats) > self.max_chats or now - last_seen > self.ttl_seconds:
+                self._chats.popitem(last=False)
+            else:
+                break
+
+    def _persist(self, chat_id: int, now: float, text: str):
+        self._db.execute("INSERT INTO messages (chat_id, ts, text) VALUES (?, ?, ?)", (chat_id, now, text))
+        # Keep only the newest max_history rows per chat on disk as well
+        self._db.execute(
+            "DELETE FROM messages WHERE chat_id = ? AND rowid NOT IN ("
+            "SELECT rowid FROM messages WHERE chat_id = ? ORDER BY ts DESC LIMIT ?)",
+            (chat_id, chat_id, self.max_history),
+        )
+        self._db.commit()
@@ -1,14 +1,57 @@
 # daily_trending_sales.py
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime, timedelta
 import streamlit as st
+import os
+import sys
 import time
 import re
+from urllib.parse import urljoin
+
+from keyword_matcher import KeywordMatcher
+
+# Headline filters, compiled once at import (whole-word, so inflected forms are listed)
+RELEVANT_KEYWORDS = [
+    'sales', 'revenue', 'revenues', 'profit', 'profits', 'profitable', 'growth', 'business', 'businesses',
+    'market', 'markets', 'industry', 'industries', 'company', 'companies', 'startup', 'startups',
+    'investment', 'investments', 'invests', 'funding', 'merger', 'mergers', 'acquisition', 'acquisitions',
+    'acquires', 'earnings', 'financial', 'economy', 'trade', 'trades', 'trading', 'export', 'exports',
+    'import', 'imports', 'deal', 'deals', 'partnership', 'partnerships', 'launch', 'launches', 'launched',
+    'expansion', 'expands', 'quarter', 'quarterly', 'annual', 'report', 'reports', 'reported'
+]
+SKIP_KEYWORDS = ['video', 'videos', 'photos', 'gallery']
+_HEADLINE_MATCHER = KeywordMatcher({"relevant": RELEVANT_KEYWORDS, "skip": SKIP_KEYWORDS})
+
+# Trending sectors; plural/derived forms are listed because matching is whole-word
+SECTOR_KEYWORDS = {
+    'Technology': ['tech', 'technology', 'ai', 'digital', 'software', 'startup', 'startups',
+                   'app', 'apps', 'platform', 'platforms'],
+    'Manufacturing': ['manufacturing', 'manufacturer', 'manufacturers', 'production', 'factory',
+                      'factories', 'industrial'],
+    'Finance': ['bank', 'banks', 'banking', 'financial', 'loan', 'loans', 'investment', 'investments',
+                'fund', 'funds', 'funding'],
+    'Healthcare': ['health', 'healthcare', 'pharma', 'medical', 'hospital', 'hospitals'],
+    'Energy': ['energy', 'power', 'oil', 'gas', 'renewable', 'renewables', 'solar'],
+    'Retail': ['retail', 'retailer', 'retailers', 'consumer', 'consumers', 'shopping', 'ecommerce',
+               'e commerce'],
+    'Auto': ['auto', 'autos', 'car', 'cars', 'vehicle', 'vehicles', 'automotive', 'automobile']
+}
+_SECTOR_MATCHER = KeywordMatcher(SECTOR_KEYWORDS)
+
+# "single-pass" parses only h2/h3 headings once; "selectors" is the original CSS selector walk
+PARSE_MODE = os.getenv("HEADLINE_PARSE_MODE", "single-pass")
+try:
+    import lxml  # noqa: F401  (optional, several times faster than html.parser)
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+# Only headings (and the anchors inside them) are built into the tree
+_HEADING_STRAINER = SoupStrainer(["h2", "h3"])
 
 class DailyTrendingSales:
-    def __init__(self):
-        self.base_url = "https://economictimes.indiatimes.com/industry"
+    def __init__(self, base_url="https://economictimes.indiatimes.com/industry"):
+        self.base_url = base_url
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -19,64 +62,112 @@ class DailyTrendingSales:
             response = requests.get(self.base_url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            headlines = []
-            
-            # Multiple selectors for different headline formats on ET
-            selectors = [
-                'h3 a',
-                '.eachStory h3 a',
-                '.story-box h3 a',
-                'h2 a',
-                '.content h3 a'
-            ]
-            
-            for selector in selectors:
-                headline_elements = soup.select(selector)
-                for element in headline_elements:
-                    if element and element.get_text(strip=True):
-                        headline_text = element.get_text(strip=True)
-                        link = element.get('href', '')
-                        
-                        # Clean and filter headlines
-                        if self.is_relevant_headline(headline_text):
-                            headlines.append({
-                                'title': headline_text,
-                                'link': self.normalize_link(link),
-                                'timestamp': datetime.now().strftime('%H:%M')
-                            })
-                        
-                        if len(headlines) >= max_headlines:
-                            break
-                
-                if len(headlines) >= max_headlines:
-                    break
-            
-            return headlines[:max_headlines] if headlines else self.get_fallback_headlines()
+            headlines = self.parse_headlines(response.content, max_headlines)
+            return headlines if headlines else self.get_fallback_headlines()
             
         except Exception as e:
             st.error(f"Error fetching headlines: {str(e)}")
             return self.get_fallback_headlines()
     
-    def is_relevant_headline(self, headline):
-        """Filter relevant business/sales headlines"""
-        relevant_keywords = [
-            'sales', 'revenue', 'profit', 'growth', 'business', 'market', 'industry',
-            'company', 'startup', 'investment', 'funding', 'merger', 'acquisition',
-            'earnings', 'financial', 'economy', 'trade', 'export', 'import', 'deal',
-            'partnership', 'launch', 'expansion', 'quarter', 'annual', 'report'
+    def parse_headlines(self, html, max_headlines=10, mode=None, base_url=None):
+        """
+        Extract relevant headlines from a section page (empty list if none)
+        
+        Args:
+            html: Page content (bytes or str)
+            max_headlines (int): Stop after this many headlines
+            mode (str): "single-pass" or "selectors" (defaults to PARSE_MODE)
+            base_url (str): Page URL that relative links resolve against;
+                without it links are resolved on economictimes.indiatimes.com
+        """
+        if (mode or PARSE_MODE) == "selectors":
+            return self._parse_with_selectors(html, max_headlines, base_url)
+        return self._parse_single_pass(html, max_headlines, base_url)
+    
+    def _parse_single_pass(self, html, max_headlines=10, base_url=None):
+        """
+        Parse only h2/h3 headings in one pass and deduplicate by link
+        
+        Same candidates as the selector list below: every "h3 a" anchor first,
+        then every "h2 a" anchor, each in document order.
+        """
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=_HEADING_STRAINER)
+        h3_anchors, h2_anchors = [], []
+        for heading in soup.find_all(["h2", "h3"]):
+            (h3_anchors if heading.name == "h3" else h2_anchors).extend(heading.find_all("a"))
+        
+        # Section pages carry no per-story time; this is when the page was parsed.
+        # The dashboard shows the index's publish/first-seen time instead (see news_ingestion)
+        parsed_at = datetime.now().strftime('%H:%M')
+        headlines, seen_links = [], set()
+        for element in h3_anchors + h2_anchors:
+            headline_text = element.get_text(strip=True)
+            if not headline_text or not self.is_relevant_headline(headline_text):
+                continue
+            link = self.normalize_link(element.get('href', ''), base_url)
+            if link in seen_links:
+                continue
+            seen_links.add(link)
+            headlines.append({
+                'title': headline_text,
+                'link': link,
+                'timestamp': parsed_at
+            })
+            if len(headlines) >= max_headlines:
+                break
+        
+        return headlines
+    
+    def _parse_with_selectors(self, html, max_headlines=10, base_url=None):
+        """Original extraction: full html.parser tree walked once per CSS selector"""
+        soup = BeautifulSoup(html, 'html.parser')
+        parsed_at = datetime.now().strftime('%H:%M')
+        headlines = []
+        
+        # Multiple selectors for different headline formats on ET
+        selectors = [
+            'h3 a',
+            '.eachStory h3 a',
+            '.story-box h3 a',
+            'h2 a',
+            '.content h3 a'
         ]
         
-        headline_lower = headline.lower()
-        return (
-            any(keyword in headline_lower for keyword in relevant_keywords) and
-            len(headline) > 20 and
-            len(headline) < 200 and
-            not any(skip in headline_lower for skip in ['video', 'photos', 'gallery'])
-        )
+        for selector in selectors:
+            headline_elements = soup.select(selector)
+            for element in headline_elements:
+                if element and element.get_text(strip=True):
+                    headline_text = element.get_text(strip=True)
+                    link = element.get('href', '')
+                    
+                    # Clean and filter headlines
+                    if self.is_relevant_headline(headline_text):
+                        headlines.append({
+                            'title': headline_text,
+                            'link': self.normalize_link(link, base_url),
+                            'timestamp': parsed_at
+                        })
+                    
+                    if len(headlines) >= max_headlines:
+                        break
+            
+            if len(headlines) >= max_headlines:
+                break
+        
+        return headlines[:max_headlines]
+    
+    def is_relevant_headline(self, headline):
+        """Filter relevant business/sales headlines"""
+        if not 20 < len(headline) < 200:
+            return False
+        # One tokenization pass covers both keyword lists
+        hits = _HEADLINE_MATCHER.match_groups(headline)
+        return "relevant" in hits and "skip" not in hits
     
-    def normalize_link(self, link):
-        """Normalize relative links to absolute URLs"""
+    def normalize_link(self, link, base_url=None):
+        """Normalize relative links to absolute URLs (resolved against base_url if given)"""
+        if base_url:
+            return urljoin(base_url, link.strip())
         if link.startswith('http'):
             return link
         elif link.startswith('/'):
@@ -117,24 +208,10 @@ class DailyTrendingSales:
     
     def get_trending_analysis(self, headlines):
         """Analyze trending topics from headlines"""
-        all_text = ' '.join([h['title'] for h in headlines]).lower()
+        all_text = ' '.join([h['title'] for h in headlines])
         
-        # Define trending categories
-        categories = {
-            'Technology': ['tech', 'ai', 'digital', 'software', 'startup', 'app', 'platform'],
-            'Manufacturing': ['manufacturing', 'production', 'factory', 'industrial'],
-            'Finance': ['bank', 'financial', 'loan', 'investment', 'fund'],
-            'Healthcare': ['health', 'pharma', 'medical', 'hospital'],
-            'Energy': ['energy', 'power', 'oil', 'gas', 'renewable', 'solar'],
-            'Retail': ['retail', 'consumer', 'shopping', 'ecommerce'],
-            'Auto': ['auto', 'car', 'vehicle', 'automotive']
-        }
-        
-        category_scores = {}
-        for category, keywords in categories.items():
-            score = sum(all_text.count(keyword) for keyword in keywords)
-            if score > 0:
-                category_scores[category] = score
+        # Whole-word occurrences per sector ("ai" no longer matches inside "said")
+        category_scores = _SECTOR_MATCHER.count_groups(all_text)
         
         # Get top trending category
         if category_scores:
@@ -155,22 +232,22 @@ class DailyTrendingSales:
 def render_daily_trending_section():
     """Render the daily trending sales section"""
     
+    from headline_cache import get_headline_cache
+    
     # Initialize trending sales in session state
     if 'trending_sales' not in st.session_state:
         st.session_state.trending_sales = DailyTrendingSales()
     
-    if 'last_fetch_time' not in st.session_state:
-        st.session_state.last_fetch_time = datetime.min
-    
-    if 'cached_headlines' not in st.session_state:
-        st.session_state.cached_headlines = []
-    
-    # Auto-refresh every 30 minutes
-    current_time = datetime.now()
-    if (current_time - st.session_state.last_fetch_time).seconds > 1800:  # 30 minutes
+    # Headlines come from one process-wide cache refreshed in the background
+    # every 30 minutes; only the very first visit waits briefly for it
+    headline_cache = get_headline_cache()
+    if not headline_cache.wait_until_loaded(timeout=0):
         with st.spinner("🔄 Fetching latest trending headlines..."):
-            st.session_state.cached_headlines = st.session_state.trending_sales.fetch_trending_headlines()
-            st.session_state.last_fetch_time = current_time
+            headline_cache.wait_until_loaded(timeout=headline_cache.timeout)
+    st.session_state.cached_headlines = headline_cache.get_headlines()
+    st.session_state.last_fetch_time = headline_cache.last_updated or datetime.now()
+    if headline_cache.last_error:
+        st.warning(f"⚠️ Some headlines could not be refreshed: {headline_cache.last_error}")
     
     # Display section
     st.markdown("---")
@@ -199,10 +276,11 @@ def render_daily_trending_section():
     with refresh_col2:
         if st.button("🔄 Refresh News", use_container_width=True):
             with st.spinner("📰 Fetching latest headlines..."):
-                st.session_state.cached_headlines = st.session_state.trending_sales.fetch_trending_headlines()
-                st.session_state.last_fetch_time = datetime.now()
-                st.success("✅ Headlines updated!")
-                time.sleep(0.5)
+                # Conditional requests make this cheap when nothing changed
+                headline_cache.refresh()
+                st.session_state.cached_headlines = headline_cache.get_headlines()
+                st.session_state.last_fetch_time = headline_cache.last_updated
+                st.toast("✅ Headlines updated!")
                 st.rerun()
     
     with refresh_col3:
@@ -228,6 +306,17 @@ def render_daily_trending_section():
         </div>
         """, unsafe_allow_html=True)
         
+        # Rolling history kept by the background headline refresher
+        from trending_engine import get_trending_engine
+        trending_engine = get_trending_engine()
+        day_trend, week_trend = trending_engine.trending("24h"), trending_engine.trending("7d")
+        rising = trending_engine.rising("24h", baseline="7d")
+        trend_note = (f"📅 Last 24h: **{day_trend['trending_sector']}** | "
+                      f"Last 7 days: **{week_trend['trending_sector']}**")
+        if rising:
+            trend_note += " | 🚀 Rising: " + ", ".join(f"{row['sector']} (×{row['ratio']})" for row in rising[:3])
+        st.markdown(trend_note)
+        
         # Headlines grid
         st.markdown("### 📰 Latest Headlines")
         
@@ -320,4 +409,65 @@ def render_daily_trending_section():
             <div class="glass-card" style="margin-bottom: 0.5rem; padding: 1rem;">
                 <p style="color: rgba(255,255,255,0.9); margin: 0;">{insight}</p>
             </div>
-            """, unsafe_allow_html=True)
\ No newline at end of file
+            """, unsafe_allow_html=True)
+
+
+def _synthetic_section_page(n_stories=200):
+    """Stand-in for a saved ET section page: navigation, scripts and story cards"""
+    topics = ["startup funding", "quarterly earnings", "export growth", "merger deal", "market revenue"]
+    nav = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(150))
+    stories = "".join(
+        f'<div class="eachStory"><h3><a href="/news/{i}">Company {i} reports {topics[i % len(topics)]} '
+        f'in annual business report</a></h3><p>{"Lorem ipsum dolor sit amet. " * 8}</p>'
+        f'<img src="/img/{i}.jpg"><span class="date">Jan {i % 28 + 1}</span></div>'
+        for i in range(n_stories)
+    )
+    trending = "".join(f'<h2><a href="/news/{i}">Company {i} reports {topics[i % len(topics)]} '
+                       f'in annual business report</a></h2>' for i in range(0, n_stories, 10))
+    script = "<script>" + "var x = 1;" * 2000 + "</script>"
+    return f"<html><head>{script}</head><body><ul>{nav}</ul>{trending}{stories}{script}</body></html>"
+
+
+def benchmark_headline_parsing(paths=None, repeats=5):
+    """
+    Compare parse time and peak memory of the selector walk and the single-pass parser
+    
+    Args:
+        paths (list): Saved ET HTML pages; a synthetic page is used if empty
+        repeats (int): Parses per page and mode
+    """
+    import tracemalloc
+    
+    pages = []
+    for path in paths or []:
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        pages.append(("synthetic page", _synthetic_section_page().encode()))
+    
+    parser = DailyTrendingSales()
+    print(f"Headline parsing benchmark (single-pass parser: {HTML_PARSER})")
+    print("=" * 60)
+    for name, html in pages:
+        selector_links = list(dict.fromkeys(h['link'] for h in parser.parse_headlines(html, 50, mode="selectors")))
+        single_pass_links = [h['link'] for h in parser.parse_headlines(html, 50, mode="single-pass")]
+        print(f"{name} ({len(html) / 1024:.0f} KB) | same links as selectors after dedup: "
+              f"{single_pass_links == selector_links[:len(single_pass_links)]}")
+        for mode in ("selectors", "single-pass"):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                headlines = parser.parse_headlines(html, mode=mode)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+            
+            tracemalloc.start()
+            parser.parse_headlines(html, mode=mode)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+            
+            distinct = len({h['link'] for h in headlines})
+            print(f"  {mode:>11}: {elapsed_ms:8.1f} ms | peak {peak_mb:6.1f} MB | "
+                  f"{len(headlines)} headlines, {distinct} distinct links")
+
+
+if __name__ == "__main__":
+    benchmark_headline_parsing(sys.argv[1:])
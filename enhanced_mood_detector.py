@@ -1,14 +1,124 @@
 # enhanced_mood_detector.py
-from transformers import pipeline
-import torch
-import re
-from typing import Dict, List, Tuple
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from inference_backends import DEFAULT_BACKEND, load_emotion_pipeline
+from keyword_matcher import KeywordMatcher, TextOrTokens, Tokens
+from model_artifacts import MODEL_DIR, artifact_id, prepare_offline_load, staged_backend
+from model_registry import registry
+from mood_cache import MoodCache
+
+# Batch size used by detect_mood_batch until tune_batch_size picks one
+# (raised to GPU_BATCH_SIZE once a model is loaded on a GPU)
+DEFAULT_BATCH_SIZE = 16
+GPU_BATCH_SIZE = 32
+# How many batches are read ahead and length-sorted together
+BATCH_SORT_WINDOW = 8
+# Longer messages are truncated to the model's input size, on every path
+MAX_INPUT_TOKENS = 512
+
+# Keyword patterns for the rule-based fallback detector
+EMOTION_KEYWORDS = {
+    "happy": ["happy", "great", "awesome", "amazing", "fantastic", "wonderful", 
+             "excellent", "love", "loved", "loves", "excited", "thrilled", "joy", "pleased"],
+    "angry": ["angry", "furious", "mad", "rage", "hate", "hated", "hates", "terrible", "awful",
+             "disgusting", "outraged", "livid"],
+    "sad": ["sad", "depressed", "disappointed", "upset", "hurt", "crying",
+           "miserable", "heartbroken", "devastated"],
+    "frustrated": ["frustrated", "annoyed", "irritated", "bothered", "stuck",
+                  "confused", "overwhelmed", "stressed"],
+    "excited": ["excited", "thrilled", "eager", "enthusiastic", "pumped",
+               "stoked", "psyched"],
+    "neutral": ["okay", "fine", "alright", "normal", "average"]
+}
+
+# Context keywords used by ReplyGenerator, checked in this order
+# (matching is whole-word, so plural and inflected forms are listed too)
+CONTEXT_PATTERNS = {
+    "pricing": ["price", "prices", "priced", "cost", "costs", "costly", "expensive", "cheap", "cheaper",
+                "budget", "budgets", "affordable"],
+    "support": ["help", "helps", "support", "problem", "problems", "issue", "issues", "broken", "not working",
+                "crash", "crashes", "crashed", "crashing", "bug", "bugs", "buggy", "glitch", "glitches",
+                "reinstall", "freeze", "freezes", "freezing", "lag", "lags", "lagging", "slow",
+                "error", "errors", "fail", "fails", "failed", "failing"],
+    "product": ["product", "products", "feature", "features", "service", "services", "offer", "offers",
+                "solution", "solutions"],
+    "greeting": ["hi", "hello", "hey", "greetings", "good morning", "good afternoon"]
+}
+
+# Words that raise sentiment intensity ("!!" and "!!!" are checked separately)
+INTENSITY_KEYWORDS = ["absolutely", "extremely", "really", "very", "so", "totally", "completely", "utterly"]
+
+# Compiled once at import and shared by every detector/generator
+_EMOTION_MATCHER = KeywordMatcher(EMOTION_KEYWORDS)
+_CONTEXT_MATCHER = KeywordMatcher(CONTEXT_PATTERNS)
+_INTENSITY_MATCHER = KeywordMatcher({"high": INTENSITY_KEYWORDS})
+
+
+def classify_intensity(text: str, keyword_hits: int) -> str:
+    """
+    High/medium/low intensity from caps, exclamation marks and intensity words
+    
+    Args:
+        text (str): The message, original case
+        keyword_hits (int): Distinct INTENSITY_KEYWORDS found in it
+    """
+    # Check for caps (indicates strong emotion)
+    caps_ratio = sum(1 for c in text if c.isupper()) / len(text) if text else 0
+    
+    # "!!!" also contains "!!", so it counts twice like the old substring checks
+    intensity_score = keyword_hits + ("!!" in text) + ("!!!" in text)
+    
+    if caps_ratio > 0.3 or intensity_score >= 2:
+        return "high"
+    elif intensity_score >= 1 or "!" in text:
+        return "medium"
+    else:
+        return "low"
+
+def _cuda_available() -> bool:
+    """Checked only after a model loaded, so importing this module never pulls in torch"""
+    torch = sys.modules.get("torch")
+    return bool(torch is not None and torch.cuda.is_available())
+
 
 class MoodDetector:
-    def __init__(self):
-        """Initialize the mood detection pipeline with error handling"""
+    def __init__(self, backend: Optional[str] = None, lazy: bool = False, model_dir: Optional[str] = None):
+        """
+        Initialize the mood detection pipeline with error handling
+        
+        Args:
+            backend (str): Inference backend, one of inference_backends.BACKENDS
+                (defaults to the MOOD_BACKEND environment variable, else "torch";
+                with a staged model_dir, to the backend in its manifest)
+            lazy (bool): Load the model on a background thread and answer with
+                the rule-based detector until it is ready
+            model_dir (str): Staged model directory (see model_artifacts.py) to
+                load from disk only; defaults to MOOD_MODEL_DIR. When set, no
+                other model or backend is tried.
+
+        Raises:
+            ModelArtifactError: if an explicitly requested backend differs
+                from the one model_dir was staged for.
+        """
         self.emotion_pipeline = None
-        self._initialize_pipeline()
+        self.model_name = None
+        self.model_dir = model_dir or MODEL_DIR
+        if self.model_dir:
+            # A staged artifact only loads with the backend it was staged for
+            self.backend = staged_backend(self.model_dir, backend or os.getenv("MOOD_BACKEND"))
+        else:
+            self.backend = backend or DEFAULT_BACKEND
+        # Recorded in every result: "<model>@<backend>" or "rule-based"
+        self.served_by = "rule-based"
+        self.batch_size = DEFAULT_BATCH_SIZE
+        # Repeated messages skip the forward pass; cleared when the model changes
+        self.cache = MoodCache(path=os.getenv("MOOD_CACHE_PATH"))
+        # Set once _initialize_pipeline finished, whether or not a model loaded
+        self.ready = threading.Event()
         
         # Enhanced mood mapping with more emotions
         self.mood_mapping = {
@@ -51,9 +161,44 @@ class MoodDetector:
             "frustrated": ["annoyance", "disappointment", "confusion", "nervousness"],
             "neutral": ["neutral", "realization", "surprise", "caring", "fear"]
         }
+        
+        if lazy:
+            threading.Thread(target=self._initialize_pipeline, name="mood-model-loader", daemon=True).start()
+        else:
+            self._initialize_pipeline()
     
     def _initialize_pipeline(self):
-        """Initialize the emotion detection pipeline with fallback options"""
+        """Load the pinned model directory, or probe hub models with fallback options"""
+        pipeline = self._load_model_dir() if self.model_dir else self._probe_models()
+        
+        if pipeline is None:
+            print("Warning: Using rule-based fallback for emotion detection")
+        else:
+            self.served_by = f"{self.model_name}@{self.backend}"
+        self.cache.set_model(self.served_by if pipeline is not None else None)
+        if pipeline is not None and _cuda_available():
+            self.batch_size = GPU_BATCH_SIZE
+        # Publish the pipeline last so callers switch over only once it is fully set up
+        self.emotion_pipeline = pipeline
+        self.ready.set()
+
+    def _load_model_dir(self):
+        """Load the staged artifact in self.model_dir from local disk only, without fallbacks"""
+        try:
+            manifest = prepare_offline_load(self.model_dir)
+            pipeline = registry.get(
+                f"pipeline:{os.path.abspath(self.model_dir)}:{self.backend}",
+                lambda: load_emotion_pipeline(self.model_dir, self.backend, local_only=True)
+            )
+        except Exception as e:
+            print(f"Failed to load staged model {self.model_dir} with {self.backend} backend: {e}")
+            return None
+        self.model_name = artifact_id(manifest)
+        print(f"Successfully loaded model: {self.model_name} from {self.model_dir} ({self.backend})")
+        return pipeline
+
+    def _probe_models(self):
+        """Try hub models (and the torch backend) in order until one loads"""
         models_to_try = [
             "j-hartmann/emotion-english-distilroberta-base",
             "cardiffnlp/twitter-roberta-base-emotion-multilabel-latest",
@@ -61,21 +206,26 @@ class MoodDetector:
         ]
         
         for model_name in models_to_try:
-            try:
-                self.emotion_pipeline = pipeline(
-                    "text-classification",
-                    model=model_name,
-                    device=0 if torch.cuda.is_available() else -1,
-                    return_all_scores=True
-                )
-                print(f"Successfully loaded model: {model_name}")
-                break
-            except Exception as e:
-                print(f"Failed to load {model_name}: {e}")
-                continue
-        
-        if self.emotion_pipeline is None:
-            print("Warning: Using rule-based fallback for emotion detection")
+            # Fall back to fp32 torch if the requested backend is unavailable
+            backends = [self.backend] if self.backend == "torch" else [self.backend, "torch"]
+            for backend in backends:
+                try:
+                    # Weights are shared process-wide through the registry
+                    pipeline = registry.get(
+                        f"pipeline:{model_name}:{backend}",
+                        lambda: load_emotion_pipeline(model_name, backend)
+                    )
+                    self.model_name = model_name
+                    self.backend = backend
+                    print(f"Successfully loaded model: {model_name} ({backend})")
+                    return pipeline
+                except Exception as e:
+                    print(f"Failed to load {model_name} with {backend} backend: {e}")
+        return None
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model finished loading (or fell back); returns False on timeout"""
+        return self.ready.wait(timeout)
     
     def detect_mood(self, text: str) -> Dict:
         """
@@ -92,7 +242,8 @@ class MoodDetector:
                 "mood": "😐 Neutral",
                 "confidence": 0.0,
                 "raw_scores": {},
-                "label": "neutral"
+                "label": "neutral",
+                "served_by": "rule-based"
             }
         
         text = text.strip()
@@ -101,64 +252,142 @@ class MoodDetector:
         if self.emotion_pipeline is None:
             return self._rule_based_detection(text)
         
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached
+        
         try:
             # Get emotion predictions
-            results = self.emotion_pipeline(text)
-            
-            # Handle different result formats
-            if isinstance(results[0], list):
-                results = results[0]
-            
-            # Sort results by score
-            sorted_results = sorted(results, key=lambda x: x['score'], reverse=True)
-            top_result = sorted_results[0]
-            
-            # Get the emotion label and confidence
-            label = top_result['label'].lower()
-            confidence = round(top_result['score'] * 100, 2)
-            
-            # Map to display format
-            mood = self.mood_mapping.get(label, f"🧠 {label.capitalize()}")
-            
-            # Create raw scores dictionary
-            raw_scores = {r['label']: round(r['score'] * 100, 2) for r in results}
-            
-            return {
-                "mood": mood,
-                "confidence": confidence,
-                "raw_scores": raw_scores,
-                "label": label
-            }
+            results = self.emotion_pipeline(text, truncation=True, max_length=MAX_INPUT_TOKENS)
+            result = self._format_result(results)
+            self.cache.put(text, result)
+            return result
             
         except Exception as e:
             print(f"Error in mood detection: {e}")
             return self._rule_based_detection(text)
     
-    def _rule_based_detection(self, text: str) -> Dict:
-        """Fallback rule-based emotion detection"""
-        text_lower = text.lower()
-        
-        # Define keyword patterns
-        emotion_keywords = {
-            "happy": ["happy", "great", "awesome", "amazing", "fantastic", "wonderful", 
-                     "excellent", "love", "excited", "thrilled", "joy", "pleased"],
-            "angry": ["angry", "furious", "mad", "rage", "hate", "terrible", "awful",
-                     "disgusting", "outraged", "livid"],
-            "sad": ["sad", "depressed", "disappointed", "upset", "hurt", "crying",
-                   "miserable", "heartbroken", "devastated"],
-            "frustrated": ["frustrated", "annoyed", "irritated", "bothered", "stuck",
-                          "confused", "overwhelmed", "stressed"],
-            "excited": ["excited", "thrilled", "eager", "enthusiastic", "pumped",
-                       "stoked", "psyched"],
-            "neutral": ["okay", "fine", "alright", "normal", "average"]
+    def _format_result(self, results) -> Dict:
+        """Turn raw pipeline scores for one text into the detect_mood dict"""
+        # Handle different result formats
+        if isinstance(results[0], list):
+            results = results[0]
+        
+        # Sort results by score
+        sorted_results = sorted(results, key=lambda x: x['score'], reverse=True)
+        top_result = sorted_results[0]
+        
+        # Get the emotion label and confidence
+        label = top_result['label'].lower()
+        confidence = round(top_result['score'] * 100, 2)
+        
+        # Map to display format
+        mood = self.mood_mapping.get(label, f"🧠 {label.capitalize()}")
+        
+        # Create raw scores dictionary
+        raw_scores = {r['label']: round(r['score'] * 100, 2) for r in results}
+        
+        return {
+            "mood": mood,
+            "confidence": confidence,
+            "raw_scores": raw_scores,
+            "label": label,
+            "served_by": self.served_by
         }
+    
+    def detect_mood_batch(self, texts: Iterable[str], batch_size: Optional[int] = None) -> List[Dict]:
+        """
+        Detect the mood of many texts using batched pipeline calls
+        
+        Args:
+            texts (Iterable[str]): List or iterator of texts to analyze
+            batch_size (int): Texts per forward pass (defaults to self.batch_size)
+            
+        Returns:
+            list: One detect_mood-style dict per input text, in input order
+        """
+        return list(self.iter_mood_batch(texts, batch_size))
+    
+    def iter_mood_batch(self, texts: Iterable[str], batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """Streaming version of detect_mood_batch that yields results in input order"""
+        batch_size = batch_size or self.batch_size
+        # Read a few batches ahead so that length sorting has texts to group
+        chunk_size = batch_size * BATCH_SORT_WINDOW
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                yield from self._detect_chunk(chunk, batch_size)
+                chunk = []
+        if chunk:
+            yield from self._detect_chunk(chunk, batch_size)
+    
+    def _detect_chunk(self, texts: List[str], batch_size: int) -> List[Dict]:
+        """Run one chunk of texts through the pipeline, sorted by length"""
+        results: List[Optional[Dict]] = [None] * len(texts)
+        
+        # Empty texts, cache hits and the rule-based fallback never reach the model
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or text.strip() == "":
+                results[i] = self.detect_mood(text)
+            elif self.emotion_pipeline is None:
+                results[i] = self._rule_based_detection(text.strip())
+            else:
+                results[i] = self.cache.get(text)
+                if results[i] is None:
+                    pending.append(i)
+        
+        # Similar lengths in one batch keep padding (wasted compute) low
+        pending.sort(key=lambda i: len(texts[i]))
+        for start in range(0, len(pending), batch_size):
+            indices = pending[start:start + batch_size]
+            batch = [texts[i].strip() for i in indices]
+            try:
+                outputs = self.emotion_pipeline(batch, batch_size=len(batch), truncation=True,
+                                                max_length=MAX_INPUT_TOKENS)
+                for i, output in zip(indices, outputs):
+                    results[i] = self._format_result(output if isinstance(output, list) else [output])
+                    self.cache.put(texts[i], results[i])
+            except Exception as e:
+                print(f"Error in batch mood detection: {e}")
+                for i in indices:
+                    results[i] = self.detect_mood(texts[i])
+        
+        return results
+    
+    def tune_batch_size(self, sample_texts: List[str], candidates: Tuple[int, ...] = (4, 8, 16, 32, 64)) -> int:
+        """
+        Pick the fastest batch size for this machine on a sample of texts
+        
+        Args:
+            sample_texts (List[str]): Representative messages
+            candidates (tuple): Batch sizes to try
+            
+        Returns:
+            int: The chosen batch size, also stored in self.batch_size
+        """
+        if self.emotion_pipeline is None or not sample_texts:
+            return self.batch_size
         
-        # Score each emotion based on keyword matches
-        emotion_scores = {}
-        for emotion, keywords in emotion_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                emotion_scores[emotion] = score
+        best_size, best_rate = self.batch_size, 0.0
+        for size in candidates:
+            start = time.perf_counter()
+            self.detect_mood_batch(sample_texts, batch_size=size)
+            rate = len(sample_texts) / (time.perf_counter() - start)
+            if rate > best_rate:
+                best_size, best_rate = size, rate
+        
+        self.batch_size = best_size
+        print(f"Tuned batch size: {best_size} ({best_rate:.1f} msgs/sec)")
+        return best_size
+    
+    def _rule_based_detection(self, text: str, emotion_hits: Optional[Dict] = None) -> Dict:
+        """Fallback rule-based emotion detection (``emotion_hits`` reuses a prior match_groups)"""
+        if emotion_hits is None:
+            emotion_hits = _EMOTION_MATCHER.match_groups(text)
+        # Score each emotion by the number of distinct keywords found
+        emotion_scores = {emotion: len(keywords) for emotion, keywords in emotion_hits.items()}
         
         # Determine primary emotion
         if emotion_scores:
@@ -174,7 +403,8 @@ class MoodDetector:
             "mood": mood,
             "confidence": confidence,
             "raw_scores": {k: v*10 for k, v in emotion_scores.items()},
-            "label": primary_emotion
+            "label": primary_emotion,
+            "served_by": "rule-based"
         }
     
     def get_mood_category(self, emotion_label: str) -> str:
@@ -195,26 +425,10 @@ class MoodDetector:
         
         return "neutral"
     
-    def analyze_sentiment_intensity(self, text: str) -> str:
-        """Analyze the intensity of the sentiment"""
-        text_lower = text.lower()
-        
-        # High intensity indicators
-        high_intensity = ["!!", "!!!", "absolutely", "extremely", "really", "very", 
-                         "so", "totally", "completely", "utterly"]
-        
-        # Check for caps (indicates strong emotion)
-        caps_ratio = sum(1 for c in text if c.isupper()) / len(text) if text else 0
-        
-        # Check for high intensity words
-        intensity_score = sum(1 for word in high_intensity if word in text_lower)
-        
-        if caps_ratio > 0.3 or intensity_score >= 2:
-            return "high"
-        elif intensity_score >= 1 or "!" in text:
-            return "medium"
-        else:
-            return "low"
+    def analyze_sentiment_intensity(self, text: str, tokens: Optional[Tokens] = None) -> str:
+        """Analyze the intensity of the sentiment (``tokens``: the text already tokenized)"""
+        # Whole-word matching: "so" no longer counts inside "also"
+        return classify_intensity(text, len(_INTENSITY_MATCHER.find_keywords(text if tokens is None else tokens)))
 
 
 class ReplyGenerator:
@@ -254,14 +468,10 @@ class ReplyGenerator:
         }
         
         # Context-specific responses
-        self.context_patterns = {
-            "pricing": ["price", "cost", "expensive", "cheap", "budget", "affordable"],
-            "support": ["help", "support", "problem", "issue", "broken", "not working", "crash", "crashing", "bug", "glitch", "reinstall", "freeze", "lag", "slow"],
-            "product": ["product", "feature", "service", "offer", "solution"],
-            "greeting": ["hi", "hello", "hey", "greetings", "good morning", "good afternoon"]
-        }
+        self.context_patterns = CONTEXT_PATTERNS
     
-    def generate_reply(self, user_input: str, mood: str, intensity: str = "medium") -> str:
+    def generate_reply(self, user_input: str, mood: str, intensity: str = "medium",
+                       tokens: Optional[Tokens] = None) -> str:
         """
         Generate a contextually appropriate reply based on mood and intensity
         
@@ -269,6 +479,7 @@ class ReplyGenerator:
             user_input (str): The user's message
             mood (str): Detected mood category
             intensity (str): Intensity level (high/medium/low)
+            tokens (Tokens): The message already tokenized (shared with other helpers)
             
         Returns:
             str: Generated reply
@@ -277,8 +488,11 @@ class ReplyGenerator:
             return "I'd be happy to help! Could you please share more details about what you're looking for?"
         
         # Detect context
-        context = self._detect_context(user_input.lower())
-        
+        context = self._detect_context(user_input if tokens is None else tokens)
+        return self.compose_reply(mood, intensity, context)
+    
+    def compose_reply(self, mood: str, intensity: str, context: str) -> str:
+        """Build the reply for an already detected context (see generate_reply)"""
         # Get base response based on mood and intensity
         base_response = self.mood_responses.get(mood, self.mood_responses["neutral"])
         response = base_response.get(intensity, base_response["medium"])
@@ -290,12 +504,9 @@ class ReplyGenerator:
         
         return response
     
-    def _detect_context(self, text: str) -> str:
-        """Detect the context of the user's message"""
-        for context, keywords in self.context_patterns.items():
-            if any(keyword in text for keyword in keywords):
-                return context
-        return "general"
+    def _detect_context(self, text: TextOrTokens) -> str:
+        """Detect the context of the user's message (text or its Tokens)"""
+        return _CONTEXT_MATCHER.first_group(text, "general")
     
     def _get_context_followup(self, context: str, mood: str) -> str:
         """Get context-specific follow-up based on detected context and mood"""
@@ -334,10 +545,11 @@ def test_enhanced_system():
         # Detect mood
         result = detector.detect_mood(message)
         category = detector.get_mood_category(result['label'])
-        intensity = detector.analyze_sentiment_intensity(message)
+        tokens = Tokens.of(message)
+        intensity = detector.analyze_sentiment_intensity(message, tokens)
         
         # Generate reply
-        reply = generator.generate_reply(message, category, intensity)
+        reply = generator.generate_reply(message, category, intensity, tokens)
         
         print(f"Message: {message}")
         print(f"Mood: {result['mood']}")
@@ -348,5 +560,44 @@ def test_enhanced_system():
         print("-" * 60)
 
 
+
+def benchmark_batch_inference(n_messages: int = 512, batch_size: Optional[int] = None):
+    """Compare detect_mood_batch throughput with the per-message loop"""
+    detector = MoodDetector()
+    seed_messages = [
+        "Hey! I'm really excited about your new product launch!",
+        "This is absolutely terrible service, I'm furious right now!!!",
+        "Can you tell me about your pricing plans?",
+        "I'm really disappointed with my recent experience",
+        "Hi there, just wanted to say your product is fantastic! We have been using it "
+        "across three teams for a month and the onboarding was smooth for everybody.",
+        "HELP! Nothing is working and I'm so frustrated!"
+    ]
+    messages = [seed_messages[i % len(seed_messages)] + f" #{i}" for i in range(n_messages)]
+    
+    # Each phase starts cold, otherwise the second one is answered from MoodCache
+    detector.cache.clear()
+    start = time.perf_counter()
+    loop_results = [detector.detect_mood(message) for message in messages]
+    loop_seconds = time.perf_counter() - start
+    
+    detector.cache.clear()
+    start = time.perf_counter()
+    batch_results = detector.detect_mood_batch(messages, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+    
+    agreement = sum(a["label"] == b["label"] for a, b in zip(loop_results, batch_results)) / n_messages
+    
+    print(f"Batch inference benchmark ({n_messages} messages, model: {detector.model_name or 'rule-based'})")
+    print("=" * 60)
+    print(f"Per-message loop: {loop_seconds:.2f}s ({n_messages / loop_seconds:.1f} msgs/sec)")
+    print(f"Batched (size {batch_size or detector.batch_size}): {batch_seconds:.2f}s "
+          f"({n_messages / batch_seconds:.1f} msgs/sec)")
+    print(f"Speed-up: {loop_seconds / batch_seconds:.2f}x | Label agreement: {agreement:.1%}")
+
+
 if __name__ == "__main__":
-    test_enhanced_system()
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        benchmark_batch_inference()
+    else:
+        test_enhanced_system()
\ No newline at end of file
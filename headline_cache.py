@@ -0,0 +1,229 @@
+# headline_cache.py
+"""
+Process-wide cache of trending headlines shared by every Streamlit session.
+
+A background thread runs a NewsIngestor over the configured source sections:
+all sections are fetched concurrently over one pooled requests.Session with
+conditional requests (ETag / If-Modified-Since), so unchanged pages cost a
+304 instead of a full download and re-parse. New headlines go into the
+persistent dedup index with their publish (or first-seen) time and into the
+trending engine. Page renders read the cache; only the very first render of
+a process waits for the initial refresh, for at most the fetch timeout,
+before showing the fallback headlines.
+
+Run ``python headline_cache.py`` for a self-test against a local HTTP server.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from daily_trending_sales import DailyTrendingSales
+from news_ingestion import DedupIndex, HtmlSource, NewsIngestor
+
+# Comma-separated section URLs; all of them are fetched in parallel
+DEFAULT_SECTIONS = [
+    url.strip() for url in
+    os.getenv("HEADLINE_SECTIONS", "https://economictimes.indiatimes.com/industry").split(",")
+    if url.strip()
+]
+REFRESH_SECONDS = float(os.getenv("HEADLINE_REFRESH_SECONDS", "1800"))  # 30 minutes
+FETCH_TIMEOUT = float(os.getenv("HEADLINE_FETCH_TIMEOUT", "10"))  # seconds
+MAX_HEADLINES = 10
+
+
+class HeadlineCache:
+    """
+    Latest headlines from the dedup index, refreshed in the background.
+
+    Each refresh is one NewsIngestor round over an HtmlSource per section;
+    the sources keep the ETag and Last-Modified validators of their last
+    response. Headlines stay in the index, so a failed or 304 refresh keeps
+    showing them.
+    """
+
+    def __init__(self, sections: Optional[List[str]] = None, refresh_seconds: float = REFRESH_SECONDS,
+                 max_headlines: int = MAX_HEADLINES, timeout: float = FETCH_TIMEOUT, trending_engine=None,
+                 index: Optional[DedupIndex] = None):
+        self.sections = list(sections or DEFAULT_SECTIONS)
+        # New headlines are also counted into the rolling trend history
+        self.trending_engine = trending_engine
+        self.refresh_seconds = refresh_seconds
+        self.max_headlines = max_headlines
+        self.timeout = timeout
+        self.parser = DailyTrendingSales()
+        self.ingestor = NewsIngestor(
+            [HtmlSource(url, timeout=timeout) for url in self.sections], index,
+            workers=min(8, len(self.sections)), trending_engine=trending_engine,
+        )
+        if trending_engine is not None:
+            # Only new headlines are passed on, so count what the index already holds
+            trending_engine.add_headlines(self.ingestor.index.recent(
+                limit=-1, since=time.time() - trending_engine.retention_seconds))
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._first_refresh = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_updated: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.counters = {"refreshes": 0, "fetched": 0, "new": 0, "not_modified": 0, "errors": 0}
+
+    def start(self) -> "HeadlineCache":
+        """Start the background refresher (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="headline-refresher", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.refresh()
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+
+    def request_refresh(self) -> None:
+        """Ask the background thread to refresh now without waiting for it"""
+        self._wake.set()
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Block until the first refresh finished; returns False on timeout"""
+        return self._first_refresh.wait(timeout)
+
+    def refresh(self) -> None:
+        """Run one ingestion round over every section; overlapping calls share one refresh"""
+        if not self._refresh_lock.acquire(blocking=False):
+            # Another thread is already refreshing; wait for its result instead
+            with self._refresh_lock:
+                return
+        try:
+            report = self.ingestor.ingest()
+            errors = [f"{name}: {error}" for name, error in report["errors"].items()]
+            if self.trending_engine is not None:
+                try:
+                    self.trending_engine.save()
+                except Exception as e:
+                    print(f"⚠️ Could not save trend history: {e}")
+                    errors.append(f"trend history: {e}")
+            with self._lock:
+                self.counters["refreshes"] += 1
+                self.counters["fetched"] += len(self.sections) - report["unchanged"] - len(report["errors"])
+                self.counters["new"] += report["new"]
+                self.counters["not_modified"] += report["unchanged"]
+                self.counters["errors"] += len(report["errors"])
+                self.last_updated = datetime.now()
+                self.last_error = "; ".join(errors) if errors else None
+        finally:
+            # Waiting renders are released even if this refresh failed
+            self._first_refresh.set()
+            self._refresh_lock.release()
+
+    def get_headlines(self) -> List[Dict]:
+        """Newest indexed headlines (timestamp = publish or first-seen time), or the fallback list"""
+        return self.ingestor.index.recent(limit=self.max_headlines) or self.parser.get_fallback_headlines()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counters, sections=len(self.sections),
+                        last_updated=self.last_updated, last_error=self.last_error)
+
+
+_shared_cache: Optional[HeadlineCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_headline_cache() -> HeadlineCache:
+    """Return the process-wide HeadlineCache, starting its refresher on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                from trending_engine import get_trending_engine
+                _shared_cache = HeadlineCache(trending_engine=get_trending_engine()).start()
+    return _shared_cache
+
+
+def run_self_test() -> bool:
+    """Exercise HeadlineCache against a local fixture server with conditional GET support"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    page = """<html><body><div class="eachStory">
+        <h3><a href="/news/{section}/1">Startup funding surges as {section} market revenue hits record</a></h3>
+        <h3><a href="/news/{section}/2">Quarterly earnings report shows strong {section} business growth</a></h3>
+        <h2><a href="/news/shared">Major merger deal announced between two industry leaders</a></h2>
+        <h3><a href="/news/{section}/video">Video: {section} market growth explained</a></h3>
+    </div></body></html>"""
+    log = []  # (path, status, client port)
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+        def do_GET(self):
+            time.sleep(0.2)  # slow origin: sequential fetching would take 0.2s per section
+            etag = f'"{self.path.strip("/")}-v1"'
+            if self.headers.get("If-None-Match") == etag:
+                log.append((self.path, 304, self.client_address[1]))
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = page.format(section=self.path.strip("/")).encode()
+            log.append((self.path, 200, self.client_address[1]))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", "Mon, 06 Jan 2025 08:00:00 GMT")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    sections = [f"{base}/tech", f"{base}/retail", f"{base}/energy"]
+
+    from trending_engine import TrendingEngine
+
+    engine = TrendingEngine()
+    try:
+        cache = HeadlineCache(sections, refresh_seconds=3600, timeout=5, trending_engine=engine,
+                              index=DedupIndex(":memory:"))
+        start = time.perf_counter()
+        cache.refresh()
+        first_seconds = time.perf_counter() - start
+        headlines = cache.get_headlines()
+
+        cache.refresh()
+        second = cache.get_headlines()
+        ports = {port for _, _, port in log}
+
+        checks = {
+            "sections fetched concurrently": first_seconds < 0.2 * len(sections),
+            "relevant headlines parsed, skip words filtered": (
+                len(headlines) == 7 and not any("Video" in h["title"] for h in headlines)),
+            "duplicate link across sections kept once": sum(h["link"].endswith("/news/shared") for h in headlines) == 1,
+            "second refresh answered with 304": [status for _, status, _ in log[len(sections):]] == [304] * len(sections),
+            "headlines and their first-seen times kept on 304": second == headlines,
+            "new headlines counted into the trend history once": engine.trending("1h")["headlines"] == 7,
+            "second refresh reused pooled connections": len(ports) <= len(sections),
+        }
+    finally:
+        server.shutdown()
+
+    print(f"HeadlineCache self-test ({len(sections)} sections, first refresh {first_seconds:.2f}s)")
+    print("=" * 60)
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    print(cache.stats())
+    return all(checks.values())
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if run_self_test() else 1)
@@ -0,0 +1,157 @@
+# inference_backends.py
+import os
+import sys
+import time
+from typing import Dict, List, Sequence
+
+# "torch" (fp32), "torch-int8" (dynamic quantization) or "onnx" (ONNX Runtime)
+BACKENDS = ("torch", "torch-int8", "onnx")
+DEFAULT_BACKEND = os.getenv("MOOD_BACKEND", "torch")
+ONNX_EXPORT_DIR = os.getenv("MOOD_ONNX_DIR", "models/onnx")
+
+# Fixed local message set for backend accuracy checks
+PARITY_MESSAGES = [
+    "Hey! I'm really excited about your new product launch!",
+    "This is absolutely terrible service, I'm furious right now!!!",
+    "I've been trying to reach someone for hours and no one is responding",
+    "This looks amazing! I love what you guys are doing",
+    "I'm really disappointed with my recent experience",
+    "Can you tell me about your pricing plans?",
+    "HELP! Nothing is working and I'm so frustrated!",
+    "Hi there, just wanted to say your product is fantastic!",
+    "I'm scared my data was lost after the update.",
+    "Honestly I didn't expect the renewal price to jump like that.",
+    "Thanks a lot, the support team fixed everything within an hour.",
+    "Could we schedule a demo for my team next Tuesday?",
+    "Why do I keep getting charged twice? This is unacceptable.",
+    "I'm curious how your analytics compare with what we use today.",
+    "Wow, I did not know you offered an annual plan!",
+    "The app keeps crashing and I'm losing customers because of it.",
+]
+
+
+def load_emotion_pipeline(model_name: str, backend: str = DEFAULT_BACKEND, local_only: bool = False):
+    """
+    Build a transformers text-classification pipeline on the chosen backend
+
+    Args:
+        model_name (str): Hub id or local directory of the model
+        backend (str): One of BACKENDS
+        local_only (bool): Never contact the hub; model_name must be on disk
+            (e.g. a directory staged by model_artifacts.py)
+
+    Returns:
+        A pipeline returning scores for all labels, like the fp32 one
+    """
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+    import torch
+
+    if backend == "torch" and not local_only:
+        return pipeline(
+            "text-classification",
+            model=model_name,
+            device=0 if torch.cuda.is_available() else -1,
+            return_all_scores=True
+        )
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=local_only)
+
+    if backend == "torch":
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=True)
+        return pipeline("text-classification", model=model, tokenizer=tokenizer,
+                        device=0 if torch.cuda.is_available() else -1, return_all_scores=True)
+
+    if backend == "torch-int8":
+        # Dynamic quantization stores Linear weights as int8 and runs on CPU only
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=local_only)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+        return pipeline("text-classification", model=model, tokenizer=tokenizer, device=-1,
+                        return_all_scores=True)
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("The onnx backend needs `pip install optimum[onnxruntime]`") from e
+
+        # Staged directories already hold the graph; otherwise export once, then
+        # reuse the saved graph on later starts
+        if os.path.exists(os.path.join(model_name, "model.onnx")):
+            export_dir = model_name
+        else:
+            export_dir = os.path.join(ONNX_EXPORT_DIR, model_name.strip("/").replace("/", "--"))
+        if os.path.exists(os.path.join(export_dir, "model.onnx")):
+            model = ORTModelForSequenceClassification.from_pretrained(export_dir, local_files_only=True)
+        elif local_only:
+            raise FileNotFoundError(f"No model.onnx in {model_name}; stage it with --backend onnx")
+        else:
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_dir)
+            tokenizer.save_pretrained(export_dir)
+        return pipeline("text-classification", model=model, tokenizer=tokenizer, return_all_scores=True)
+
+    raise ValueError(f"Unknown backend {backend!r}; choose from {BACKENDS}")
+
+
+def compare_backends(backends: Sequence[str] = ("torch-int8", "onnx"),
+                     messages: List[str] = PARITY_MESSAGES, repeats: int = 5) -> Dict[str, Dict]:
+    """
+    Check accuracy parity and latency/memory of each backend against fp32 torch
+
+    Returns:
+        dict: Per backend: top-label agreement, max score difference (points),
+        mean latency per message (ms) and memory added by loading it (MB).
+    """
+    from enhanced_mood_detector import MoodDetector
+    from model_registry import registry
+
+    def run(detector):
+        detector.cache.clear()
+        results = [detector.detect_mood(message) for message in messages]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            detector.cache.clear()
+            for message in messages:
+                detector.detect_mood(message)
+        latency_ms = (time.perf_counter() - start) * 1000 / (repeats * len(messages))
+        return results, latency_ms
+
+    reference = MoodDetector(backend="torch")
+    reference_results, reference_latency = run(reference)
+    report = {"torch": {
+        "label_agreement": 1.0,
+        "max_score_diff": 0.0,
+        "latency_ms": round(reference_latency, 2),
+        "memory_mb": registry.stats()["models"].get(f"pipeline:{reference.model_name}:torch", {}).get("memory_mb"),
+    }}
+
+    for backend in backends:
+        detector = MoodDetector(backend=backend)
+        if detector.backend != backend:
+            print(f"Skipping {backend}: it could not be loaded")
+            continue
+        results, latency = run(detector)
+        agreement = sum(r["label"] == ref["label"] for r, ref in zip(results, reference_results)) / len(messages)
+        max_diff = max(
+            abs(r["raw_scores"].get(label, 0.0) - score)
+            for r, ref in zip(results, reference_results)
+            for label, score in ref["raw_scores"].items()
+        )
+        report[backend] = {
+            "label_agreement": round(agreement, 3),
+            "max_score_diff": round(max_diff, 2),
+            "latency_ms": round(latency, 2),
+            "memory_mb": registry.stats()["models"].get(f"pipeline:{detector.model_name}:{backend}", {}).get("memory_mb"),
+        }
+
+    print(f"Backend comparison on {len(messages)} messages (reference: fp32 torch)")
+    print("=" * 60)
+    for backend, row in report.items():
+        print(f"{backend:>11}: agreement {row['label_agreement']:.0%} | max score diff {row['max_score_diff']} pts | "
+              f"{row['latency_ms']} ms/msg | +{row['memory_mb']} MB")
+    return report
+
+
+if __name__ == "__main__":
+    compare_backends(sys.argv[1:] or ("torch-int8", "onnx"))
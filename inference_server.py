@@ -0,0 +1,144 @@
+# inference_server.py
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+# Defaults, overridable through the environment
+DEFAULT_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+# Callers stop waiting after this long and get the rule-based answer instead
+DEFAULT_RESULT_TIMEOUT = float(os.getenv("INFERENCE_RESULT_TIMEOUT", "30"))  # seconds
+LATENCY_WINDOW = 2000  # Number of recent requests kept for percentiles
+
+
+class MicroBatchServer:
+    """
+    In-process inference queue shared by the Telegram bot and the dashboard.
+
+    Callers submit single texts; a worker thread collects them for up to
+    ``max_wait_ms`` (or until ``max_batch_size`` is reached), runs them as one
+    ``detect_mood_batch`` call and hands each result back through a Future.
+    """
+
+    def __init__(self, detector, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        self.detector = detector
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+
+        self._worker = threading.Thread(target=self._run, name="mood-microbatch", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue one text and return a Future resolving to its detect_mood dict"""
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def detect_mood(self, text: str, timeout: Optional[float] = DEFAULT_RESULT_TIMEOUT) -> Dict:
+        """
+        Blocking helper with the same signature as MoodDetector.detect_mood
+
+        If the batch fails or no result arrives within ``timeout`` seconds,
+        the text is answered by the detector's rule-based fallback instead.
+        """
+        future = self.submit(text)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"⚠️ Micro-batch result timed out after {timeout}s; using rule-based detection")
+        except Exception as e:
+            print(f"⚠️ Micro-batch inference failed ({e}); using rule-based detection")
+        if not text or not text.strip():
+            return self.detector.detect_mood(text)
+        return self.detector._rule_based_detection(text.strip())
+
+    def _collect_batch(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # The single worker must survive anything one batch does, or every caller would hang
+        while True:
+            try:
+                self._run_batch(self._collect_batch())
+            except Exception as e:
+                print(f"Error in micro-batch worker: {e}")
+
+    def _run_batch(self, batch: List) -> None:
+        # Callers that timed out have cancelled their futures; skip their texts
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+        texts = [text for text, _, _ in batch]
+        try:
+            results = self.detector.detect_mood_batch(texts, batch_size=len(texts))
+        except Exception as e:
+            print(f"Error in micro-batch inference: {e}")
+            for _, future, _ in batch:
+                self._resolve(future, exception=e)
+            return
+
+        done = time.perf_counter()
+        for (_, future, _), result in zip(batch, results):
+            self._resolve(future, result=result)
+
+        with self._stats_lock:
+            self._latencies.extend(done - queued_at for _, _, queued_at in batch)
+            self._batches += 1
+            self._requests += len(batch)
+
+    @staticmethod
+    def _resolve(future: Future, result=None, exception: Optional[BaseException] = None) -> None:
+        """Complete a future unless it was cancelled or completed meanwhile"""
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def stats(self) -> Dict:
+        """Queue depth, average batch fill ratio and p50/p99 latency in ms"""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            batches = self._batches
+            requests = self._requests
+        fill_ratio = requests / (batches * self.max_batch_size) if batches else 0.0
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            index = min(int(round(p * (len(latencies) - 1))), len(latencies) - 1)
+            return round(latencies[index] * 1000, 2)
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": batches,
+            "requests": requests,
+            "batch_fill_ratio": round(fill_ratio, 3),
+            "p50_latency_ms": percentile(0.50),
+            "p99_latency_ms": percentile(0.99),
+        }
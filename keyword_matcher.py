@@ -0,0 +1,337 @@
+# keyword_matcher.py
+import re
+import string
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+
+_TOKEN_RE = re.compile(r"\w+")
+_PLAIN_KEYWORD_RE = re.compile(r"\w+(?: \w+)*")
+# ASCII punctuation and common typographic marks become spaces; "_" is a word character
+_PUNCTUATION_TABLE = str.maketrans({c: " " for c in string.punctuation.replace("_", "") + "‘’“”…–—"})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of ``text``, equivalent to re.findall(r"\w+", text.lower())"""
+    return _split_lowered(text.lower())
+
+
+def _split_lowered(lowered: str) -> List[str]:
+    translated = lowered.translate(_PUNCTUATION_TABLE)
+    tokens = translated.split()
+    # translate + split is several times faster than the regex; fall back to it
+    # only when other symbols (emoji, rare punctuation, "_") are left in the text
+    if tokens and not "".join(tokens).isalnum():
+        return _TOKEN_RE.findall(translated)
+    return tokens
+
+
+class Tokens:
+    """
+    A text lowercased and tokenized once, for several matchers to share.
+
+    Every KeywordMatcher method accepts a Tokens in place of the text, so
+    helpers that each look up a different keyword table do not re-tokenize:
+
+        tokens = Tokens.of(message)
+        _SUMMARY_MATCHER.match_groups(tokens), _CONTEXT_MATCHER.first_group(tokens)
+    """
+    __slots__ = ("lowered", "words", "distinct", "_padded")
+
+    def __init__(self, text: str):
+        self.lowered = text.lower()
+        self.words = _split_lowered(self.lowered)
+        self.distinct = set(self.words)
+        self._padded = None
+
+    @classmethod
+    def of(cls, text: Union[str, "Tokens"]) -> "Tokens":
+        """``text`` tokenized, or returned as is if it already is a Tokens"""
+        return text if isinstance(text, Tokens) else cls(text)
+
+    @property
+    def padded(self) -> str:
+        """Space-joined tokens with a space on each side (built on first use)"""
+        if self._padded is None:
+            self._padded = f" {' '.join(self.words)} "
+        return self._padded
+
+
+TextOrTokens = Union[str, Tokens]
+
+
+class KeywordMatcher:
+    """
+    Find every keyword group present in a text in a single pass.
+
+    The text is lowercased and split into word tokens once (see tokenize); single-word
+    keywords are then found with one set intersection and multi-word phrases
+    by a substring check on the space-joined tokens. Matching therefore respects
+    word boundaries, so "hi" no longer matches inside "this". Keywords with
+    punctuation (e.g. "!!") go through one compiled regex instead.
+    Build matchers once (at import) and reuse them for every message; pass
+    a Tokens instead of the text when several matchers look at one message.
+
+    Example:
+        matcher = KeywordMatcher({"greeting": ["hi", "hello"], "pricing": ["price"]})
+        matcher.match_groups("Hi, what's the price?")
+        # {"greeting": {"hi"}, "pricing": {"price"}}
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: Dict[str, List[str]] = {name: list(keywords) for name, keywords in groups.items()}
+
+        # keyword -> groups it belongs to (a keyword may appear in several)
+        self._keyword_groups: Dict[str, List[str]] = {}
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                self._keyword_groups.setdefault(keyword.lower(), []).append(name)
+
+        self._words: Set[str] = set()
+        self._phrases: Dict[str, List[Tuple[str, str]]] = {}  # first token -> (phrase, " phrase ")
+        symbols = []
+        for keyword in self._keyword_groups:
+            if not _PLAIN_KEYWORD_RE.fullmatch(keyword):
+                symbols.append(keyword)
+            elif " " in keyword:
+                first_token = keyword.split(" ", 1)[0]
+                self._phrases.setdefault(first_token, []).append((keyword, f" {keyword} "))
+            else:
+                self._words.add(keyword)
+        self._phrase_starts = set(self._phrases)
+
+        # Word boundaries only apply on the sides where the keyword has a word character
+        self._symbol_pattern = None
+        if symbols:
+            alternatives = [
+                (r"(?<!\w)" if re.match(r"\w", k) else "") + re.escape(k) + (r"(?!\w)" if re.search(r"\w$", k) else "")
+                for k in sorted(symbols, key=len, reverse=True)
+            ]
+            self._symbol_pattern = re.compile("|".join(alternatives))
+
+    def find_keywords(self, text: TextOrTokens) -> Set[str]:
+        """Distinct keywords (lowercased) that occur in the text"""
+        if isinstance(text, Tokens):
+            # A shared set: intersections iterate the smaller side, so each matcher costs little
+            lowered, words, distinct = text.lowered, text.words, text.distinct
+        else:
+            # A one-off text is cheaper to match against its token list than to build a set
+            lowered = text.lower()
+            words = distinct = _split_lowered(lowered)
+        found = self._words.intersection(distinct)
+
+        if self._phrase_starts and not self._phrase_starts.isdisjoint(distinct):
+            # Space-joined tokens make phrase lookups plain substring checks
+            # that still respect word boundaries
+            padded = text.padded if isinstance(text, Tokens) else f" {' '.join(words)} "
+            for token in self._phrase_starts.intersection(distinct):
+                for keyword, padded_keyword in self._phrases[token]:
+                    if padded_keyword in padded:
+                        found.add(keyword)
+
+        if self._symbol_pattern is not None:
+            found.update(match.group(0) for match in self._symbol_pattern.finditer(lowered))
+        return found
+
+    def match_groups(self, text: TextOrTokens) -> Dict[str, Set[str]]:
+        """Map each group with at least one hit to its distinct keywords, in group order"""
+        return self.groups_for(self.find_keywords(text))
+
+    def groups_for(self, keywords: Set[str]) -> Dict[str, Set[str]]:
+        """Group an already computed find_keywords() result"""
+        hits: Dict[str, Set[str]] = {}
+        for keyword in keywords:
+            for name in self._keyword_groups.get(keyword, ()):
+                hits.setdefault(name, set()).add(keyword)
+        return {name: hits[name] for name in self.groups if name in hits}
+
+    def count_keywords(self, text: TextOrTokens) -> Counter:
+        """Occurrences of each keyword (lowercased) in the text, at word boundaries"""
+        shared = Tokens.of(text)
+        tokens = shared.words
+        token_counts = Counter(tokens)
+        counts = Counter({word: token_counts[word] for word in self._words.intersection(token_counts)})
+
+        if self._phrase_starts and not self._phrase_starts.isdisjoint(token_counts):
+            # Compare token windows at each position where a phrase can start
+            for i, token in enumerate(tokens):
+                for keyword, _ in self._phrases.get(token, ()):
+                    phrase_tokens = keyword.split(" ")
+                    if tokens[i:i + len(phrase_tokens)] == phrase_tokens:
+                        counts[keyword] += 1
+
+        if self._symbol_pattern is not None:
+            counts.update(match.group(0) for match in self._symbol_pattern.finditer(shared.lowered))
+        return counts
+
+    def count_groups(self, text: TextOrTokens) -> Dict[str, int]:
+        """Total keyword occurrences per group with at least one hit, in group order"""
+        totals: Dict[str, int] = {}
+        for keyword, count in self.count_keywords(text).items():
+            for name in self._keyword_groups.get(keyword, ()):
+                totals[name] = totals.get(name, 0) + count
+        return {name: totals[name] for name in self.groups if name in totals}
+
+    def first_group(self, text: TextOrTokens, default: Optional[str] = None) -> Optional[str]:
+        """The first group (in definition order) with a hit, or ``default``"""
+        hits = self.match_groups(text)
+        return next(iter(hits), default)
+
+    def has_any(self, text: TextOrTokens) -> bool:
+        return bool(self.find_keywords(text))
+
+    @classmethod
+    def combine(cls, matchers: Dict[str, "KeywordMatcher"]) -> "KeywordMatcher":
+        """Merge several matchers into one, prefixing group names with "<name>:" """
+        return cls({
+            f"{prefix}:{group}": keywords
+            for prefix, matcher in matchers.items()
+            for group, keywords in matcher.groups.items()
+        })
+
+    @staticmethod
+    def namespace(hits: Dict[str, Set[str]], prefix: str) -> Dict[str, Set[str]]:
+        """Select the hits of one matcher from a combined match_groups() result"""
+        start = f"{prefix}:"
+        return {group[len(start):]: keywords for group, keywords in hits.items() if group.startswith(start)}
+
+
+# Messages the substring loops and the matchers must classify the same way
+PARITY_MESSAGES = [
+    "I have some issues with billing",
+    "Your prices are too high",
+    "What are the costs?",
+    "keeps failing with errors",
+    "Found bugs",
+    "Hi, what's the price of the premium plan?",
+    "The app keeps crashing and I'm REALLY frustrated!!",
+    "I am so excited, can we book a demo next week?",
+    "It's okay I guess, the service is fine.",
+    "Absolutely terrible experience, I'm very disappointed and upset.",
+    "Hello! Tell me more about your product features",
+    "I loved the new features, the products are great",
+    "We scheduled two meetings to compare your plans",
+    "Support never answered and the app crashed twice, I hate it",
+    "We made the switch, can you ship this week?",
+]
+PARITY_HEADLINES = [
+    "Reliance announces two new deals with global partners",
+    "Indian companies ramp up hiring amid strong markets",
+    "Adani Group launches green hydrogen business unit",
+    "Infosys reports record quarterly profits on deal wins",
+    "Tata Motors sales rise 12% in September",
+    "Photos: Inside the new Tesla showroom in Mumbai",
+]
+# Substring hits inside other words that whole-word matching drops on purpose
+PARITY_EXCEPTIONS = {
+    "We made the switch, can you ship this week?": "'mad' and 'hi' no longer match inside 'made'/'ship'/'this'",
+}
+
+
+def check_substring_parity() -> bool:
+    """Compare the matchers with the substring loops they replaced on PARITY_MESSAGES"""
+    from enhanced_mood_detector import CONTEXT_PATTERNS, EMOTION_KEYWORDS, _CONTEXT_MATCHER, _EMOTION_MATCHER
+    from lead_utils import SUMMARY_KEYWORDS, _SUMMARY_MATCHER
+
+    def substring(text):
+        lowered = text.lower()
+        return (
+            [name for name, words in SUMMARY_KEYWORDS.items() if any(w in lowered for w in words)],
+            next((name for name, words in CONTEXT_PATTERNS.items() if any(w in lowered for w in words)), "general"),
+            [name for name, words in EMOTION_KEYWORDS.items() if any(w in lowered for w in words)],
+        )
+
+    def matchers(text):
+        return (list(_SUMMARY_MATCHER.match_groups(text)), _CONTEXT_MATCHER.first_group(text, "general"),
+                list(_EMOTION_MATCHER.match_groups(text)))
+
+    print("Keyword parity with the substring loops (summary, context, emotion)")
+    print("=" * 60)
+    ok = True
+    for message in PARITY_MESSAGES:
+        old, new = substring(message), matchers(message)
+        same = old == new
+        if not same and message in PARITY_EXCEPTIONS:
+            print(f"➖ {message!r}: {PARITY_EXCEPTIONS[message]}")
+            continue
+        ok &= same
+        print(f"{'✅' if same else '❌'} {message!r}: {new}" + ("" if same else f" (substring loops: {old})"))
+
+    try:
+        from daily_trending_sales import RELEVANT_KEYWORDS, SKIP_KEYWORDS, DailyTrendingSales
+    except ImportError as e:
+        print(f"⚠️ Skipping headline parity ({e})")
+        return ok
+    analyzer = DailyTrendingSales()
+    for headline in PARITY_HEADLINES:
+        lowered = headline.lower()
+        old = any(k in lowered for k in RELEVANT_KEYWORDS) and not any(k in lowered for k in SKIP_KEYWORDS)
+        new = analyzer.is_relevant_headline(headline)
+        ok &= old == new
+        print(f"{'✅' if old == new else '❌'} {headline!r}: relevant={new}")
+    return ok
+
+
+def benchmark_keyword_matching(repeats: int = 2000):
+    """
+    Time the substring loops, the per-site matchers and the combined matcher
+
+    The per-site matchers share one Tokens per message, as the helpers do when
+    given ``tokens``; each on its own text would tokenize the message again.
+    AnalysisPipeline uses the combined matcher for the app and the bot.
+    """
+    from enhanced_mood_detector import EMOTION_KEYWORDS, CONTEXT_PATTERNS
+    from lead_utils import SUMMARY_KEYWORDS, _SUMMARY_MATCHER
+    from enhanced_mood_detector import _CONTEXT_MATCHER, _EMOTION_MATCHER
+    # The imported matchers check for keyword_matcher.Tokens, not this script's copy under __main__
+    from keyword_matcher import Tokens
+
+    messages = [
+        "Hi! I'm really impressed by your service and want to know more about your premium plan.",
+        "This is absolutely terrible service, I'm furious and the app keeps crashing after every update!",
+        "Can we schedule a demo next week? Our budget for this quarter is fairly tight.",
+        "I'm disappointed, nothing works and support has not answered my emails for days.",
+    ]
+
+    def old_loops(text):
+        lowered = text.lower()
+        summary = [name for name, words in SUMMARY_KEYWORDS.items() if any(w in lowered for w in words)]
+        context = next((name for name, words in CONTEXT_PATTERNS.items() if any(w in lowered for w in words)), "general")
+        emotions = {name: sum(1 for w in words if w in lowered) for name, words in EMOTION_KEYWORDS.items()}
+        return summary, context, emotions
+
+    def new_matchers(text):
+        tokens = Tokens.of(text)
+        return (_SUMMARY_MATCHER.match_groups(tokens), _CONTEXT_MATCHER.first_group(tokens, "general"),
+                _EMOTION_MATCHER.match_groups(tokens))
+
+    combined = KeywordMatcher.combine({
+        "summary": _SUMMARY_MATCHER, "context": _CONTEXT_MATCHER, "emotion": _EMOTION_MATCHER
+    })
+
+    def combined_matcher(text):
+        hits = combined.match_groups(text)
+        return (KeywordMatcher.namespace(hits, "summary"), next(iter(KeywordMatcher.namespace(hits, "context")), "general"),
+                KeywordMatcher.namespace(hits, "emotion"))
+
+    # Short chat messages and a long pasted email thread
+    for label, texts in (("short messages", messages), ("long message", [" ".join(messages * 15)])):
+        print(f"{label} ({sum(map(len, texts)) // len(texts)} chars avg)")
+        for name, fn in (("substring loops", old_loops), ("per-site matchers", new_matchers),
+                         ("combined matcher", combined_matcher)):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                for message in texts:
+                    fn(message)
+            elapsed = time.perf_counter() - start
+            per_message_us = elapsed / (repeats * len(texts)) * 1e6
+            print(f"  {name:>17}: {per_message_us:8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    import sys
+    parity_ok = check_substring_parity()
+    print()
+    benchmark_keyword_matching()
+    sys.exit(0 if parity_ok else 1)
@@ -0,0 +1,103 @@
+# lead_aggregates.py
+import csv
+import json
+import os
+from typing import Dict, Iterable
+
+from file_lock import atomic_replace
+
+LEAD_TYPES = ("hot", "warm", "cold")
+
+
+def classify_lead_type(score) -> str:
+    """Map a 'Lead Score' value such as '🔥 Hot' to hot/warm/cold"""
+    if isinstance(score, str) and "🔥" in score:
+        return "hot"
+    elif isinstance(score, str) and "🟠" in score:
+        return "warm"
+    else:
+        return "cold"
+
+
+def _to_float(value) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if number == number else 0.0
+
+
+class LeadAggregates:
+    """
+    Running per-lead-type totals kept next to the lead CSV.
+
+    The totals are stored in ``<csv>.agg.json`` together with the CSV size
+    they describe. LeadStore updates them on every append; if the CSV was
+    changed by something else, the size no longer matches and the totals are
+    rebuilt with a single scan.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.counts = {lead_type: 0 for lead_type in LEAD_TYPES}
+        # Sum of the stored 'estimated_revenue' column per lead type
+        self.recorded_revenue = {lead_type: 0.0 for lead_type in LEAD_TYPES}
+        self.csv_size = 0
+        self.rebuilt = False
+
+    @staticmethod
+    def path_for(csv_path: str) -> str:
+        return f"{csv_path}.agg.json"
+
+    def add(self, lead: Dict) -> None:
+        lead_type = classify_lead_type(lead.get("Lead Score"))
+        self.rows += 1
+        self.counts[lead_type] += 1
+        self.recorded_revenue[lead_type] += _to_float(lead.get("estimated_revenue"))
+
+    def add_many(self, leads: Iterable[Dict]) -> None:
+        for lead in leads:
+            self.add(lead)
+
+    def revenue(self, hot_value: int, warm_value: int) -> int:
+        return self.counts["hot"] * hot_value + self.counts["warm"] * warm_value
+
+    @classmethod
+    def rebuild(cls, csv_path: str) -> "LeadAggregates":
+        """Scan the CSV once and compute fresh totals"""
+        aggregates = cls()
+        aggregates.rebuilt = True
+        if os.path.exists(csv_path):
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                aggregates.add_many(csv.DictReader(f))
+            aggregates.csv_size = os.path.getsize(csv_path)
+        return aggregates
+
+    @classmethod
+    def load(cls, csv_path: str) -> "LeadAggregates":
+        """Return the stored totals, rebuilding them if they are missing or stale"""
+        csv_size = os.path.getsize(csv_path) if os.path.exists(csv_path) else 0
+        try:
+            with open(cls.path_for(csv_path), encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("csv_size") == csv_size:
+                aggregates = cls()
+                aggregates.rows = data["rows"]
+                aggregates.counts.update(data["counts"])
+                aggregates.recorded_revenue.update(data["recorded_revenue"])
+                aggregates.csv_size = csv_size
+                return aggregates
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls.rebuild(csv_path)
+
+    def save(self, csv_path: str) -> None:
+        """Persist the totals for the CSV's current size (caller holds the CSV lock)"""
+        self.csv_size = os.path.getsize(csv_path) if os.path.exists(csv_path) else 0
+        with atomic_replace(self.path_for(csv_path)) as f:
+            json.dump({
+                "rows": self.rows,
+                "counts": self.counts,
+                "recorded_revenue": self.recorded_revenue,
+                "csv_size": self.csv_size,
+            }, f)
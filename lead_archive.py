@@ -0,0 +1,351 @@
+# lead_archive.py
+"""
+Columnar, date-partitioned copy of lead_data.csv for the dashboard.
+
+lead_data.csv keeps long free-text Message/Reply columns next to the few
+small fields the charts aggregate. The archive mirrors it as Parquet files
+under ``lead_data_archive/date=YYYY-MM-DD/``, so readers load only the columns they
+ask for and skip whole days outside the requested range (partition pruning
+plus row-group statistics on the parsed ``timestamp`` column).
+
+LeadStore only ever appends, so sync() converts just the bytes added since
+the last sync. A CSV that was replaced (revenue edits, schema migration) has
+a new inode and is re-archived from scratch. lead_data.csv stays the source
+of truth; export_csv() writes the LEAD_COLUMNS layout back out.
+
+Requires pyarrow; without it, read() falls back to a column-pruned CSV read.
+
+Usage:
+    python lead_archive.py sync [lead_data.csv]
+    python lead_archive.py export out.csv [--start 2025-07-01] [--end 2025-07-31]
+    python lead_archive.py benchmark
+"""
+import csv
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from file_lock import atomic_replace, file_lock
+from lead_store import LEAD_COLUMNS
+from revenue_insights import classify_lead_types
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    ARCHIVE_AVAILABLE = True
+except ImportError:
+    ARCHIVE_AVAILABLE = False
+
+LEAD_ARCHIVE_DIR = os.getenv("LEAD_ARCHIVE_DIR")  # default: "<csv name>_archive" next to the CSV
+SYNC_CHUNK_ROWS = 100_000  # CSV rows converted per Parquet file during a sync
+STATE_FILE = "_sync_state.json"  # "_" prefix: ignored by the dataset reader
+NUMERIC_COLUMNS = ("Confidence", "estimated_revenue")
+# Added to every archived row: the parsed Timestamp, for range filters
+DERIVED_COLUMNS = ["timestamp"]
+
+DateLike = Union[str, date, datetime, None]
+
+
+def _archive_schema():
+    fields = [(column, pa.float64() if column in NUMERIC_COLUMNS else pa.string()) for column in LEAD_COLUMNS]
+    return pa.schema(fields + [("timestamp", pa.timestamp("s"))])
+
+
+def _as_datetime(value: DateLike, end_of_day: bool = False) -> Optional[datetime]:
+    """Parse a range bound; a bare date as ``end`` includes that whole day"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        value = value.isoformat()
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) <= 10:
+        parsed += timedelta(days=1) - timedelta(seconds=1)
+    return parsed
+
+
+def _prepare_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed archive columns for a chunk of raw CSV rows (all read as strings)"""
+    df = df.reindex(columns=LEAD_COLUMNS)
+    for column in LEAD_COLUMNS:
+        if column in NUMERIC_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        else:
+            df[column] = df[column].fillna("").astype(str)
+    df["timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce", format="mixed").astype("datetime64[s]")
+    # Always derived from Lead Score, like load_lead_frame, rather than trusting the stored column
+    df["lead_type"] = classify_lead_types(df["Lead Score"].replace("", None)).astype(str)
+    return df
+
+
+class LeadArchive:
+    """
+    Parquet mirror of one lead CSV, kept in sync incrementally.
+
+    Example:
+        archive = LeadArchive("lead_data.csv")
+        archive.sync()
+        archive.read(["Timestamp", "lead_type"], start="2025-07-01")
+    """
+
+    def __init__(self, csv_path: str = "lead_data.csv", archive_dir: Optional[str] = LEAD_ARCHIVE_DIR):
+        self.csv_path = csv_path
+        self.archive_dir = archive_dir or f"{os.path.splitext(csv_path)[0]}_archive"
+        self._lock = threading.Lock()
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.archive_dir, STATE_FILE)
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self._state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict) -> None:
+        with atomic_replace(self._state_path) as f:
+            json.dump(state, f)
+
+    def _clear(self) -> None:
+        for name in os.listdir(self.archive_dir):
+            if name.startswith("date="):
+                shutil.rmtree(os.path.join(self.archive_dir, name))
+            elif name.startswith("_") and name.endswith(".tmp"):  # left by an interrupted sync
+                os.remove(os.path.join(self.archive_dir, name))
+
+    def sync(self) -> int:
+        """
+        Archive the CSV rows added since the last sync
+
+        Returns:
+            int: Rows converted by this call (the whole file after a rebuild)
+        """
+        if not ARCHIVE_AVAILABLE or not os.path.exists(self.csv_path):
+            return 0
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with self._lock, file_lock(self._state_path):
+            state = self._load_state()
+            # Shared lock: LeadStore cannot append while the tail is read
+            with file_lock(self.csv_path, shared=True):
+                stat = os.stat(self.csv_path)
+                offset = state.get("csv_offset", 0)
+                if state.get("csv_inode") != stat.st_ino or stat.st_size < offset:
+                    # Replaced or truncated: the archived prefix no longer matches
+                    self._clear()
+                    state, offset = {}, 0
+                if stat.st_size == offset:
+                    return 0
+
+                with open(self.csv_path, "rb") as f:
+                    header = f.readline()
+                    if offset > len(header):
+                        f.seek(offset)
+                    names = next(csv.reader([header.decode("utf-8")]))
+                    written = self._convert(f, names, start_offset=offset)
+
+            self._save_state({
+                "csv_offset": stat.st_size,
+                "csv_inode": stat.st_ino,
+                "rows": state.get("rows", 0) + written,
+                "synced_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            })
+        return written
+
+    def _convert(self, f, names: List[str], start_offset: int) -> int:
+        """Write the CSV rows readable from ``f`` as Parquet parts, one per day per chunk"""
+        schema = _archive_schema()
+        written = 0
+        try:
+            reader = pd.read_csv(f, names=names, header=None, dtype=str, keep_default_na=False,
+                                 encoding="utf-8", chunksize=SYNC_CHUNK_ROWS)
+        except pd.errors.EmptyDataError:  # only blank lines were appended
+            return 0
+        for chunk_number, chunk in enumerate(reader):
+            chunk = _prepare_rows(chunk)
+            days = chunk["timestamp"].dt.strftime("%Y-%m-%d").fillna("unknown")
+            for day, rows in chunk.groupby(days, sort=False):
+                directory = os.path.join(self.archive_dir, f"date={day}")
+                os.makedirs(directory, exist_ok=True)
+                # Named after the CSV offset: a sync retried after a crash overwrites, never duplicates
+                name = f"part-{start_offset:012d}-{chunk_number:04d}.parquet"
+                table = pa.Table.from_pandas(rows[LEAD_COLUMNS + DERIVED_COLUMNS], schema=schema,
+                                             preserve_index=False)
+                # Written outside the partition under a "_" name, so a concurrent read never sees it
+                tmp_path = os.path.join(self.archive_dir, f"_{day}-{name}.tmp")
+                pq.write_table(table, tmp_path, compression="zstd")
+                os.replace(tmp_path, os.path.join(directory, name))
+            written += len(chunk)
+        return written
+
+    def rebuild(self) -> int:
+        """Re-archive the whole CSV"""
+        if os.path.exists(self._state_path):
+            os.remove(self._state_path)
+        return self.sync()
+
+    def read(self, columns: Optional[List[str]] = None, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """
+        Leads with only ``columns``, limited to [start, end]
+
+        Args:
+            columns (list): LEAD_COLUMNS and/or the parsed "timestamp" (all if omitted)
+            start, end: Dates or datetimes (ISO strings accepted); a bare end date is inclusive
+
+        Returns:
+            pd.DataFrame: Matching rows in CSV order within each day, days ascending
+        """
+        start_at, end_at = _as_datetime(start), _as_datetime(end, end_of_day=True)
+        if not ARCHIVE_AVAILABLE:
+            return self._read_csv(columns, start_at, end_at)
+
+        self.sync()
+        columns = list(columns or LEAD_COLUMNS + DERIVED_COLUMNS)
+        if not os.path.isdir(self.archive_dir) or not any(
+                name.startswith("date=") for name in os.listdir(self.archive_dir)):
+            return pd.DataFrame(columns=columns)
+
+        partition_schema = pa.schema([("date", pa.string())])
+        dataset = ds.dataset(self.archive_dir, format="parquet",
+                             schema=pa.unify_schemas([_archive_schema(), partition_schema]),
+                             partitioning=ds.partitioning(partition_schema, flavor="hive"),
+                             ignore_prefixes=[".", "_"])
+        condition = None
+        if start_at is not None:
+            # The date partition test prunes whole directories before any file is opened
+            condition = (ds.field("date") >= start_at.strftime("%Y-%m-%d")) & (ds.field("timestamp") >= start_at)
+        if end_at is not None:
+            upper = (ds.field("date") <= end_at.strftime("%Y-%m-%d")) & (ds.field("timestamp") <= end_at)
+            condition = upper if condition is None else condition & upper
+        table = dataset.to_table(columns=columns, filter=condition)
+        return table.to_pandas()
+
+    def _read_csv(self, columns: Optional[List[str]], start_at: Optional[datetime],
+                  end_at: Optional[datetime]) -> pd.DataFrame:
+        """read() without pyarrow: parse only the needed CSV columns"""
+        if not os.path.exists(self.csv_path):
+            return pd.DataFrame(columns=columns)
+        columns = list(columns or LEAD_COLUMNS + DERIVED_COLUMNS)
+        needed = {column for column in columns if column in LEAD_COLUMNS}
+        if "timestamp" in columns or start_at or end_at:
+            needed.add("Timestamp")
+        if "lead_type" in columns:
+            needed.add("Lead Score")
+        df = _prepare_rows(pd.read_csv(self.csv_path, usecols=lambda c: c in needed, dtype=str,
+                                       keep_default_na=False, encoding="utf-8"))
+        if start_at is not None:
+            df = df[df["timestamp"] >= start_at]
+        if end_at is not None:
+            df = df[df["timestamp"] <= end_at]
+        return df[columns].reset_index(drop=True)
+
+    def export_csv(self, path: str, start: DateLike = None, end: DateLike = None) -> int:
+        """Write archived leads back out in the lead_data.csv layout; returns the row count"""
+        df = self.read(LEAD_COLUMNS, start, end)
+        with atomic_replace(path) as f:
+            df.to_csv(f, index=False, lineterminator="\n")
+        return len(df)
+
+    def stats(self) -> Dict:
+        state = self._load_state()
+        files = [os.path.join(root, name) for root, _, names in os.walk(self.archive_dir)
+                 for name in names if name.endswith(".parquet")] if os.path.isdir(self.archive_dir) else []
+        return {
+            "available": ARCHIVE_AVAILABLE,
+            "rows": state.get("rows", 0),
+            "files": len(files),
+            "bytes": sum(os.path.getsize(path) for path in files),
+            "synced_at": state.get("synced_at"),
+        }
+
+
+_shared_archives: Dict[str, LeadArchive] = {}
+_shared_archives_lock = threading.Lock()
+
+
+def get_lead_archive(csv_path: str = "lead_data.csv") -> LeadArchive:
+    """Return the process-wide LeadArchive for ``csv_path``"""
+    with _shared_archives_lock:
+        if csv_path not in _shared_archives:
+            _shared_archives[csv_path] = LeadArchive(csv_path)
+        return _shared_archives[csv_path]
+
+
+def benchmark_lead_archive(n_rows: int = 200_000, days: int = 90):
+    """Time the timeline query on the archive against parsing the whole CSV"""
+    import tempfile
+    import numpy as np
+    from lead_store import LeadStore
+
+    rng = np.random.default_rng(11)
+    base = datetime(2025, 1, 1)
+    filler = "I would like to know more about the enterprise plan and whether it supports our team. " * 3
+    scores = np.array(["🔥 Hot", "🟠 Warm", "❄️ Cold", "🟡 Medium"], dtype=object)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "leads.csv")
+        offsets = np.sort(rng.integers(0, days * 86400, n_rows))
+        LeadStore(csv_path).append_many({
+            "Timestamp": (base + timedelta(seconds=int(offset))).strftime("%Y-%m-%d %H:%M:%S"),
+            "Message": filler, "Mood": "🤔 Curious", "Mood Category": "neutral", "Confidence": 88.5,
+            "Intensity": "low", "Reply": filler, "Lead Score": scores[i % len(scores)],
+            "Summary": "Inquired about pricing.", "Suggested Action": "Send pricing details",
+        } for i, offset in enumerate(offsets))
+        archive = LeadArchive(csv_path, os.path.join(tmp, "archive"))
+
+        start = time.perf_counter()
+        archive.sync()
+        sync_seconds = time.perf_counter() - start
+
+        LeadStore(csv_path).append_many([{"Timestamp": "2025-03-31 12:00:00", "Lead Score": "🔥 Hot"}] * 100)
+        start = time.perf_counter()
+        archive.sync()
+        incremental_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        full = pd.read_csv(csv_path)
+        full["lead_type"] = classify_lead_types(full["Lead Score"])
+        pd.to_datetime(full["Timestamp"])
+        csv_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        timeline = archive.read(["timestamp", "lead_type"])
+        archive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        week = archive.read(["timestamp", "lead_type"], start="2025-03-25", end="2025-03-31")
+        week_seconds = time.perf_counter() - start
+
+        csv_mb = os.path.getsize(csv_path) / 1e6
+        stats = archive.stats()
+
+    print(f"Lead archive benchmark ({n_rows:,} leads over {days} days, CSV {csv_mb:.0f} MB, "
+          f"archive {stats['bytes'] / 1e6:.1f} MB in {stats['files']} files)")
+    print("=" * 60)
+    print(f"Initial sync:                 {sync_seconds:.2f}s")
+    print(f"Incremental sync (100 rows):  {incremental_ms:.1f} ms")
+    print(f"Full CSV parse for charts:    {csv_seconds * 1000:.0f} ms")
+    print(f"Archive, 2 columns, all days: {archive_seconds * 1000:.0f} ms ({len(timeline):,} rows)")
+    print(f"Archive, 2 columns, last 7d:  {week_seconds * 1000:.0f} ms ({len(week):,} rows)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        archive = LeadArchive(sys.argv[2] if len(sys.argv) > 2 else "lead_data.csv")
+        print(f"📦 Archived {archive.sync():,} new rows: {archive.stats()}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "export":
+        bounds = {flag: sys.argv[sys.argv.index(f"--{flag}") + 1] for flag in ("start", "end")
+                  if f"--{flag}" in sys.argv}
+        print(f"💾 Exported {get_lead_archive().export_csv(sys.argv[2], **bounds):,} rows to {sys.argv[2]}")
+    else:
+        benchmark_lead_archive()
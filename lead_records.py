@@ -0,0 +1,296 @@
+# lead_records.py
+"""
+Compact in-memory storage for the leads of a dashboard session.
+
+A long session used to keep one ten-key dict per analyzed message, and the
+same fields (mood, category, intensity, lead score, reply template, next
+action) repeat a handful of values over and over. LeadTable stores the
+leads column-wise instead: low-cardinality fields as small integer codes
+into a per-column category list, Confidence as a float array plus a type
+flag per row (the rule-based detector reports integers, and exports keep
+showing ``60`` rather than ``60.0``), Timestamp as epoch seconds and only
+Message as a list of strings. Rows are read back
+through LeadRecord views that support ``item['Mood']`` like the old dicts.
+
+Run ``python lead_records.py`` to compare the memory of 100k leads stored
+as dicts and in a LeadTable.
+"""
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+# Keys of a session lead, in AnalysisResult.to_lead order
+LEAD_FIELDS = [
+    "Timestamp", "Message", "Mood", "Mood Category", "Confidence", "Intensity",
+    "Reply", "Lead Score", "Summary", "Suggested Action",
+]
+# Few distinct values each (replies and summaries are built from fixed templates)
+CATEGORICAL_FIELDS = ("Mood", "Mood Category", "Intensity", "Reply", "Lead Score", "Summary", "Suggested Action")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_EPOCH = datetime(1970, 1, 1)
+# How a row's Confidence was given, so it is returned with the same type
+_FLOAT, _INT, _OTHER = 0, 1, 2
+
+
+def _timestamp_seconds(value: str) -> Optional[int]:
+    """Seconds since the epoch for a "YYYY-MM-DD HH:MM:SS" string, else None"""
+    try:
+        if len(value) != 19 or value[4] != "-" or value[10] != " ":
+            return None
+        # Slicing is several times faster than strptime for the fixed format
+        moment = datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                          int(value[11:13]), int(value[14:16]), int(value[17:19]))
+    except (TypeError, ValueError):
+        return None
+    return int((moment - _EPOCH).total_seconds())
+
+
+class LeadRecord:
+    """Read-only view of one LeadTable row; ``record['Mood']`` works like the old lead dicts"""
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "LeadTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, field: str):
+        return self._table.value(self._row, field)
+
+    def get(self, field: str, default=None):
+        return self._table.value(self._row, field) if field in self._table.fields else default
+
+    def keys(self) -> List[str]:
+        return list(self._table.fields)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.fields)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self._table.fields
+
+    def to_dict(self) -> Dict:
+        return {field: self._table.value(self._row, field) for field in self._table.fields}
+
+    def __repr__(self) -> str:
+        return f"LeadRecord({self.to_dict()!r})"
+
+
+class LeadTable:
+    """
+    Column-oriented, dictionary-encoded list of leads.
+
+    Supports the list operations the dashboard uses (append, len, iteration,
+    indexing, slicing, clear); iteration yields LeadRecord views. Use
+    to_dicts() for json.dumps and to_frame() for pandas.
+
+    Example:
+        table = LeadTable()
+        table.append(result.to_lead())
+        table[-1]["Lead Score"], table.column("Confidence")
+    """
+
+    def __init__(self, leads: Iterable[Dict] = ()):
+        self.fields = list(LEAD_FIELDS)
+        self._categorical = [field for field in self.fields if field in CATEGORICAL_FIELDS]
+        self._codes: Dict[str, array] = {field: array("H") for field in self._categorical}
+        self._categories: Dict[str, List[str]] = {field: [] for field in self._categorical}
+        self._category_index: Dict[str, Dict[str, int]] = {field: {} for field in self._categorical}
+        self._seconds = array("q")
+        self._odd_timestamps: Dict[int, str] = {}  # row -> Timestamp not in TIMESTAMP_FORMAT
+        self._confidence = array("d")
+        self._confidence_kind = bytearray()  # _FLOAT, _INT or _OTHER per row
+        self._odd_confidence: Dict[int, object] = {}  # row -> Confidence that is not a number
+        self._messages: List[str] = []
+        self.extend(leads)
+
+    def _encode(self, field: str, value) -> None:
+        value = "" if value is None else value
+        index = self._category_index[field]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self._categories[field])
+            self._categories[field].append(value)
+            if code > 0xFFFF and self._codes[field].typecode == "H":
+                self._codes[field] = array("I", self._codes[field])
+        self._codes[field].append(code)
+
+    def append(self, lead: Dict) -> None:
+        """Add one lead dict (the dict itself is not kept)"""
+        row = len(self._messages)
+        timestamp = lead.get("Timestamp", "")
+        seconds = _timestamp_seconds(timestamp)
+        if seconds is None:
+            self._odd_timestamps[row] = timestamp
+            seconds = 0
+        self._seconds.append(seconds)
+        self._append_confidence(row, lead.get("Confidence"))
+        for field in self._categorical:
+            self._encode(field, lead.get(field))
+        self._messages.append(lead.get("Message", ""))
+
+    def _append_confidence(self, row: int, confidence) -> None:
+        if isinstance(confidence, float):
+            kind = _FLOAT
+        elif isinstance(confidence, int) and not isinstance(confidence, bool):
+            kind = _INT
+        else:
+            kind = _OTHER
+            self._odd_confidence[row] = confidence
+            try:
+                confidence = float(confidence)
+            except (TypeError, ValueError):
+                confidence = 0.0
+        self._confidence.append(confidence)
+        self._confidence_kind.append(kind)
+
+    def _confidence_value(self, row: int):
+        kind = self._confidence_kind[row]
+        if kind == _FLOAT:
+            return self._confidence[row]
+        if kind == _INT:
+            return int(self._confidence[row])
+        return self._odd_confidence[row]
+
+    def extend(self, leads: Iterable[Dict]) -> None:
+        for lead in leads:
+            self.append(lead)
+
+    def clear(self) -> None:
+        """Drop every lead (categories are kept; they are few and likely to recur)"""
+        for field in self._categorical:
+            self._codes[field] = array("H")
+        self._seconds = array("q")
+        self._odd_timestamps.clear()
+        self._confidence = array("d")
+        self._confidence_kind = bytearray()
+        self._odd_confidence.clear()
+        self._messages = []
+
+    def value(self, row: int, field: str):
+        if field in self._codes:
+            return self._categories[field][self._codes[field][row]]
+        if field == "Message":
+            return self._messages[row]
+        if field == "Confidence":
+            return self._confidence_value(row)
+        if field == "Timestamp":
+            if row in self._odd_timestamps:
+                return self._odd_timestamps[row]
+            return (_EPOCH + timedelta(seconds=self._seconds[row])).strftime(TIMESTAMP_FORMAT)
+        raise KeyError(field)
+
+    def column(self, field: str) -> List:
+        """Every value of one field, in row order"""
+        if field in self._codes:
+            categories = self._categories[field]
+            return [categories[code] for code in self._codes[field]]
+        if field == "Confidence":
+            if not any(self._confidence_kind):
+                return self._confidence.tolist()
+            return [self._confidence_value(row) for row in range(len(self))]
+        if field == "Message":
+            return list(self._messages)
+        return [self.value(row, field) for row in range(len(self))]
+
+    def distinct(self, field: str) -> List[str]:
+        """Values of a categorical field that occur in the current rows"""
+        used = set(self._codes[field])
+        return [value for code, value in enumerate(self._categories[field]) if code in used]
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[LeadRecord]:
+        return (LeadRecord(self, row) for row in range(len(self)))
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return [LeadRecord(self, row) for row in range(len(self))[key]]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("lead index out of range")
+        return LeadRecord(self, key)
+
+    def to_dicts(self) -> List[Dict]:
+        """Plain dicts in the old session format (e.g. for json.dumps)"""
+        columns = {field: self.column(field) for field in self.fields}
+        return [dict(zip(self.fields, values)) for values in zip(*(columns[field] for field in self.fields))]
+
+    def to_frame(self):
+        """pandas DataFrame with the categorical fields as pd.Categorical (built from the codes)"""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for field in self.fields:
+            if field in self._codes:
+                codes = np.frombuffer(self._codes[field], dtype=np.uint16 if self._codes[field].typecode == "H" else np.uint32)
+                data[field] = pd.Categorical.from_codes(codes.astype(np.int32), categories=self._categories[field])
+            elif field == "Confidence" and self._odd_confidence:
+                # Keep the column numeric for charts when some values were not numbers
+                data[field] = self._confidence.tolist()
+            else:
+                data[field] = self.column(field)
+        return pd.DataFrame(data, columns=self.fields)
+
+
+def measure_lead_memory(n_leads: int = 100_000) -> Dict[str, float]:
+    """Bytes retained by ``n_leads`` session leads as dicts versus in a LeadTable"""
+    import random
+    import tracemalloc
+    from analysis_pipeline import AnalysisPipeline
+    from enhanced_mood_detector import MoodDetector, ReplyGenerator
+
+    detector = MoodDetector()
+    pipeline = AnalysisPipeline(detector, ReplyGenerator())
+    samples = [
+        "Hi, what's the price of the premium plan?",
+        "The app keeps crashing and I'm REALLY frustrated!!",
+        "I am so excited, can we book a demo next week?",
+        "It's okay I guess, the service is fine.",
+        "Absolutely terrible experience, I'm very disappointed and upset.",
+        "Hello! Tell me more about this product feature",
+    ]
+    rng = random.Random(5)
+    # Messages are the user's input and cost the same in both layouts; they are created up front
+    messages = [f"{rng.choice(samples)} (order #{i})" for i in range(n_leads)]
+
+    def retained(build) -> int:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del kept
+        return size
+
+    # Leads come from a real analysis each, as in the app (fresh timestamp/reply/summary strings)
+    def as_dicts():
+        return [pipeline.analyze(message).to_lead() for message in messages]
+
+    def as_table():
+        table = LeadTable()
+        for message in messages:
+            table.append(pipeline.analyze(message).to_lead())
+        return table
+
+    dict_bytes = retained(as_dicts)
+    table_bytes = retained(as_table)
+    report = {
+        "leads": n_leads,
+        "dict_mb": round(dict_bytes / 1e6, 2),
+        "table_mb": round(table_bytes / 1e6, 2),
+        "dict_bytes_per_lead": round(dict_bytes / n_leads),
+        "table_bytes_per_lead": round(table_bytes / n_leads),
+    }
+    print(f"Session lead memory ({n_leads:,} leads, messages excluded)")
+    print("=" * 60)
+    print(f"List of dicts: {report['dict_mb']} MB ({report['dict_bytes_per_lead']} bytes/lead)")
+    print(f"LeadTable:     {report['table_mb']} MB ({report['table_bytes_per_lead']} bytes/lead)")
+    print(f"Reduction:     {dict_bytes / max(table_bytes, 1):.1f}x")
+    return report
+
+
+if __name__ == "__main__":
+    measure_lead_memory()
@@ -0,0 +1,183 @@
+# lead_store.py
+import csv
+import io
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List
+
+from file_lock import atomic_replace, file_lock
+from lead_aggregates import LeadAggregates
+
+# Column order of lead_data.csv
+LEAD_COLUMNS = [
+    "Timestamp", "Message", "Mood", "Mood Category", "Confidence", "Intensity",
+    "Reply", "Lead Score", "Summary", "Suggested Action", "lead_type", "estimated_revenue"
+]
+
+
+def _cell(value) -> str:
+    """Format one value the way pandas.to_csv does (NaN/None -> empty)"""
+    if value is None or value != value:  # NaN is the only value not equal to itself
+        return ""
+    return value
+
+
+class LeadStore:
+    """
+    Append-only CSV storage for analyzed leads.
+
+    Each save writes a single row at the end of the file under a cross-process
+    lock, so the cost no longer grows with the number of stored leads and the
+    bot and the UI can save concurrently. Files written with another column
+    layout are migrated to LEAD_COLUMNS once, on first use.
+    """
+
+    def __init__(self, path: str = "lead_data.csv"):
+        self.path = path
+        self._schema_checked = False
+
+    def append(self, lead: Dict) -> None:
+        """Append one lead dict (missing columns are left empty)"""
+        self.append_many([lead])
+
+    def append_many(self, leads: Iterable[Dict]) -> int:
+        """Append several leads in one locked write; returns how many were written"""
+        leads = list(leads)
+        if not leads:
+            return 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        for lead in leads:
+            writer.writerow([_cell(lead.get(column)) for column in LEAD_COLUMNS])
+
+        with file_lock(self.path):
+            self._ensure_schema()
+            # Loaded before writing so a stale file is detected by its size
+            aggregates = LeadAggregates.load(self.path)
+            with open(self.path, "a+", newline="", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    f.write(",".join(LEAD_COLUMNS) + "\n")
+                elif not self._ends_with_newline():
+                    f.write("\n")
+                f.write(buffer.getvalue())
+            aggregates.add_many(leads)
+            aggregates.save(self.path)
+        return len(leads)
+
+    def aggregates(self) -> LeadAggregates:
+        """Running hot/warm/cold totals for the stored leads (O(1) when fresh)"""
+        with file_lock(self.path):
+            aggregates = LeadAggregates.load(self.path)
+            if aggregates.rebuilt and os.path.exists(self.path):
+                aggregates.save(self.path)
+            return aggregates
+
+    def iter_rows(self) -> Iterator[Dict]:
+        """Yield every stored lead as a dict of strings"""
+        if not os.path.exists(self.path):
+            return
+        with file_lock(self.path, shared=True):
+            with open(self.path, newline="", encoding="utf-8") as f:
+                yield from csv.DictReader(f)
+
+    def rewrite(self, leads: Iterable[Dict]) -> None:
+        """Atomically replace the whole file, e.g. after editing revenue estimates"""
+        with file_lock(self.path):
+            aggregates = LeadAggregates()
+            with atomic_replace(self.path) as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(LEAD_COLUMNS)
+                for lead in leads:
+                    writer.writerow([_cell(lead.get(column)) for column in LEAD_COLUMNS])
+                    aggregates.add(lead)
+            aggregates.save(self.path)
+            self._schema_checked = True
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _ensure_schema(self) -> None:
+        """Migrate an existing file to LEAD_COLUMNS (caller holds the lock)"""
+        if self._schema_checked:
+            return
+        self._schema_checked = True
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+
+        with open(self.path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        if header == LEAD_COLUMNS:
+            return
+
+        dropped = [column for column in header if column not in LEAD_COLUMNS]
+        if dropped:
+            print(f"⚠️ Warning: dropping unknown columns from {self.path}: {dropped}")
+        print(f"🔄 Migrating {self.path} to the current lead schema")
+        with open(self.path, newline="", encoding="utf-8") as src, atomic_replace(self.path) as dst:
+            writer = csv.writer(dst, lineterminator="\n")
+            writer.writerow(LEAD_COLUMNS)
+            for row in csv.DictReader(src):
+                writer.writerow([_cell(row.get(column)) for column in LEAD_COLUMNS])
+
+
+def migrate_csv(path: str = "lead_data.csv") -> None:
+    """Bring an existing lead CSV to the LEAD_COLUMNS layout"""
+    store = LeadStore(path)
+    with file_lock(path):
+        store._ensure_schema()
+
+
+def benchmark_lead_store(sizes: List[int] = (10_000, 100_000, 1_000_000),
+                         appends: int = 200, legacy_max_rows: int = 100_000):
+    """Time appends on files of various sizes, against the old pandas rewrite"""
+    import tempfile
+
+    sample = {
+        "Timestamp": "2025-07-20 08:44:43",
+        "Message": "Can you tell me about your pricing plans? I'm interested in the premium features.",
+        "Mood": "🤔 Curious", "Mood Category": "neutral", "Confidence": 91.2,
+        "Intensity": "low", "Reply": "Would you like to discuss our pricing options?",
+        "Lead Score": "🟠 Warm", "Summary": "Inquired about pricing.",
+        "Suggested Action": "Send pricing details", "lead_type": "warm", "estimated_revenue": 5000,
+    }
+
+    def legacy_save(data, filename):
+        import pandas as pd
+        df = pd.DataFrame([data])
+        existing = pd.read_csv(filename)
+        pd.concat([existing, df], ignore_index=True).to_csv(filename, index=False, encoding="utf-8")
+
+    print("Lead store append benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"leads_{size}.csv")
+            LeadStore(path).append_many(sample for _ in range(size))
+            store = LeadStore(path)
+
+            start = time.perf_counter()
+            for _ in range(appends):
+                store.append(sample)
+            append_ms = (time.perf_counter() - start) * 1000 / appends
+            line = f"{size:>9,} rows | append: {append_ms:8.3f} ms/lead"
+
+            if size <= legacy_max_rows:
+                legacy_runs = max(appends // 20, 1)
+                start = time.perf_counter()
+                for _ in range(legacy_runs):
+                    legacy_save(sample, path)
+                legacy_ms = (time.perf_counter() - start) * 1000 / legacy_runs
+                line += f" | read-concat-rewrite: {legacy_ms:9.1f} ms/lead"
+            else:
+                line += " | read-concat-rewrite: skipped"
+            print(line)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        migrate_csv(sys.argv[2] if len(sys.argv) > 2 else "lead_data.csv")
+    else:
+        benchmark_lead_store()
@@ -1,5 +1,32 @@
-import pandas as pd
 from datetime import datetime
+from typing import Optional
+
+from keyword_matcher import KeywordMatcher, Tokens
+from lead_store import LeadStore
+
+# Intent keywords and the summary sentence each one adds, in summary order
+# (matching is whole-word, so plural and inflected forms are listed too)
+SUMMARY_KEYWORDS = {
+    "pricing": ["price", "prices", "priced", "cost", "costs", "charge", "charges", "charged",
+                "plan", "plans", "pricing"],
+    "demo": ["demo", "demos", "schedule", "scheduled", "scheduling", "book", "booked", "booking",
+             "meeting", "meetings"],
+    "problem": [
+        "problem", "problems", "issue", "issues", "not working", "support", "crash", "crashes", "crashed",
+        "crashing", "bug", "bugs", "buggy", "glitch", "glitches", "reinstall", "freeze", "freezes", "freezing",
+        "lag", "lags", "lagging", "slow", "error", "errors", "fail", "fails", "failed", "failing", "failure"
+    ],
+    "dissatisfaction": [
+        "disappointed", "upset", "bad experience", "angry", "frustrated", "unhappy", "unsatisfied"
+    ]
+}
+SUMMARY_PHRASES = {
+    "pricing": "Inquired about pricing.",
+    "demo": "Requested a demo.",
+    "problem": "Reported a problem.",
+    "dissatisfaction": "Expressed dissatisfaction."
+}
+_SUMMARY_MATCHER = KeywordMatcher(SUMMARY_KEYWORDS)
 
 def get_lead_warmth_score(mood_category: str, intensity: str) -> str:
     """Determine warmth score based on mood and intensity."""
@@ -12,25 +39,14 @@ def get_lead_warmth_score(mood_category: str, intensity: str) -> str:
     else:
         return "🟡 Medium"
 
-def generate_lead_summary(user_input: str) -> str:
-    """Generate a brief summary based on common keywords in user input."""
-    lowered = user_input.lower()
-    summary_parts = []
-
+def generate_lead_summary(user_input: str, tokens: Optional[Tokens] = None) -> str:
+    """Generate a brief summary based on common keywords in user input (``tokens``: the input already tokenized)."""
     # Check for intent phrases
-    if any(word in lowered for word in ["price", "cost", "charge", "plan", "pricing"]):
-        summary_parts.append("Inquired about pricing.")
-    if any(word in lowered for word in ["demo", "schedule", "book", "meeting"]):
-        summary_parts.append("Requested a demo.")
-    if any(word in lowered for word in [
-        "problem", "issue", "not working", "support", "crash", "crashing", "bug",
-        "glitch", "reinstall", "freeze", "lag", "slow", "error", "fail"
-    ]):
-        summary_parts.append("Reported a problem.")
-    if any(word in lowered for word in [
-        "disappointed", "upset", "bad experience", "angry", "frustrated", "unhappy", "unsatisfied"
-    ]):
-        summary_parts.append("Expressed dissatisfaction.")
+    return summarize_intents(_SUMMARY_MATCHER.match_groups(user_input if tokens is None else tokens))
+
+def summarize_intents(intents) -> str:
+    """Summary sentence for intents already found by the summary matcher (in SUMMARY_KEYWORDS order)."""
+    summary_parts = [SUMMARY_PHRASES[intent] for intent in intents]
 
     return " ".join(summary_parts) if summary_parts else "General inquiry."
 
@@ -50,15 +66,7 @@ def suggest_next_action(summary: str) -> str:
 
 def save_lead_to_csv(data: dict, filename: str = "lead_data.csv") -> None:
     """Append the lead data to CSV for storage."""
-    df = pd.DataFrame([data])
-    try:
-        existing = pd.read_csv(filename)
-        df = pd.concat([existing, df], ignore_index=True)
-    except FileNotFoundError:
-        pass
-    except Exception as e:
-        print(f"⚠️ Warning: Error reading {filename}: {e}")
     try:
-        df.to_csv(filename, index=False, encoding='utf-8')
+        LeadStore(filename).append(data)
     except Exception as e:
         print(f"❌ Error saving to CSV: {e}")
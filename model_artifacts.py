@@ -0,0 +1,205 @@
+# model_artifacts.py
+"""
+Local model artifacts for offline, deterministic MoodDetector start-up.
+
+A model is staged once (on a machine with hub access) into a directory with a
+checksum manifest; inference nodes then set MOOD_MODEL_DIR to that directory
+and load it from disk only, with no hub lookups and no fallback probing.
+
+Usage:
+    python model_artifacts.py stage j-hartmann/emotion-english-distilroberta-base models/emotion [--backend onnx]
+    python model_artifacts.py verify models/emotion
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Dict, Optional
+
+from inference_backends import BACKENDS
+
+MANIFEST_NAME = "artifact_manifest.json"
+# When set, MoodDetector loads only this staged directory
+MODEL_DIR = os.getenv("MOOD_MODEL_DIR")
+# Checksums are read from disk on every start unless disabled (e.g. on a read-only trusted image)
+VERIFY_ON_LOAD = os.getenv("MOOD_MODEL_VERIFY", "1") != "0"
+
+
+class ModelArtifactError(Exception):
+    """Raised when a staged model directory is missing, incomplete or modified"""
+
+
+def _sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _artifact_files(model_dir: str):
+    for root, _, files in os.walk(model_dir):
+        for name in sorted(files):
+            if name == MANIFEST_NAME:
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, model_dir).replace(os.sep, "/"), path
+
+
+def write_manifest(model_dir: str, model_name: str, backend: str) -> Dict:
+    """Checksum every file in model_dir and write the manifest next to them"""
+    files = {rel: {"sha256": _sha256(path), "bytes": os.path.getsize(path)}
+             for rel, path in _artifact_files(model_dir)}
+    manifest = {
+        "model_name": model_name,
+        "backend": backend,
+        "files": files,
+        # One digest over all file hashes identifies this exact artifact
+        "digest": hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest(),
+        "staged_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(os.path.join(model_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(model_dir: str) -> Dict:
+    path = os.path.join(model_dir, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ModelArtifactError(f"{model_dir} has no {MANIFEST_NAME}; stage it with model_artifacts.py") from None
+    except ValueError as e:
+        raise ModelArtifactError(f"Unreadable manifest in {model_dir}: {e}") from e
+
+
+def verify_model_dir(model_dir: str, checksums: bool = True) -> Dict:
+    """
+    Check a staged directory against its manifest
+
+    Args:
+        model_dir (str): Directory written by stage_model
+        checksums (bool): Re-hash every file; otherwise only compare sizes
+
+    Returns:
+        dict: The manifest
+
+    Raises:
+        ModelArtifactError: if a file is missing, resized or its hash differs.
+    """
+    manifest = read_manifest(model_dir)
+    for rel, expected in manifest["files"].items():
+        path = os.path.join(model_dir, rel)
+        if not os.path.exists(path):
+            raise ModelArtifactError(f"{model_dir}: missing {rel}")
+        if os.path.getsize(path) != expected["bytes"]:
+            raise ModelArtifactError(f"{model_dir}: {rel} has the wrong size")
+        if checksums and _sha256(path) != expected["sha256"]:
+            raise ModelArtifactError(f"{model_dir}: checksum mismatch for {rel}")
+    return manifest
+
+
+def artifact_id(manifest: Dict) -> str:
+    """Stable name of a staged artifact, e.g. "j-hartmann/emotion-...#3f2a9c1d0b7e" """
+    return f"{manifest['model_name']}#{manifest['digest'][:12]}"
+
+
+def stage_model(model_name: str, dest_dir: str, backend: str = "torch") -> Dict:
+    """
+    Download a model once and save it as a self-contained local directory
+
+    The files are written to "<dest_dir>.partial" and moved into place only
+    after the manifest is complete, so a crashed download never looks staged.
+
+    Args:
+        model_name (str): Hub id (or local path) of the model
+        dest_dir (str): Target directory, replaced if it exists
+        backend (str): "onnx" stores an exported ONNX graph; the torch
+            backends store the regular weights (int8 is quantized at load)
+
+    Returns:
+        dict: The written manifest
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; choose from {BACKENDS}")
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    partial_dir = f"{dest_dir}.partial"
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    os.makedirs(partial_dir)
+
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(partial_dir)
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("The onnx backend needs `pip install optimum[onnxruntime]`") from e
+        ORTModelForSequenceClassification.from_pretrained(model_name, export=True).save_pretrained(partial_dir)
+    else:
+        AutoModelForSequenceClassification.from_pretrained(model_name).save_pretrained(partial_dir)
+
+    manifest = write_manifest(partial_dir, model_name, "onnx" if backend == "onnx" else "torch")
+    shutil.rmtree(dest_dir, ignore_errors=True)
+    os.replace(partial_dir, dest_dir)
+    print(f"📦 Staged {artifact_id(manifest)} in {dest_dir} ({len(manifest['files'])} files)")
+    return manifest
+
+
+def staged_backend(model_dir: str, requested: Optional[str] = None) -> str:
+    """
+    Backend a staged directory must be loaded with
+
+    Args:
+        model_dir (str): Directory written by stage_model
+        requested (str): Backend asked for explicitly (argument or MOOD_BACKEND), if any
+
+    Returns:
+        str: The manifest's backend; ``requested`` (else "torch") if the
+        manifest cannot be read, so the loader reports that error instead
+
+    Raises:
+        ModelArtifactError: if ``requested`` differs from the staged backend.
+    """
+    try:
+        staged = read_manifest(model_dir).get("backend", "torch")
+    except ModelArtifactError:
+        return requested or "torch"
+    if requested and requested != staged:
+        raise ModelArtifactError(
+            f"{model_dir} was staged for the {staged} backend but {requested} was requested; "
+            f"unset MOOD_BACKEND or re-stage with --backend {requested}"
+        )
+    return staged
+
+
+def prepare_offline_load(model_dir: str, verify: Optional[bool] = None) -> Dict:
+    """
+    Verify a staged directory and switch the HF libraries to offline mode
+
+    Must run before transformers is first imported for the environment
+    variables to take full effect; MoodDetector calls it from its loader.
+    """
+    manifest = verify_model_dir(model_dir, checksums=VERIFY_ON_LOAD if verify is None else verify)
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    return manifest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "stage":
+        backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else "torch"
+        stage_model(sys.argv[2], sys.argv[3], backend)
+    elif len(sys.argv) == 3 and sys.argv[1] == "verify":
+        try:
+            start = time.perf_counter()
+            manifest = verify_model_dir(sys.argv[2])
+            print(f"✅ {artifact_id(manifest)} verified in {time.perf_counter() - start:.2f}s")
+        except ModelArtifactError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    else:
+        print(__doc__)
+        sys.exit(2)
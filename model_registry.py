@@ -0,0 +1,133 @@
+# model_registry.py
+import threading
+import time
+from typing import Any, Callable, Dict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _current_rss_mb() -> float:
+    """Return the resident memory of this process in MB (0.0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each model exactly once.
+
+    Streamlit sessions and the Telegram bot run as threads of the same
+    process, so they all share the objects held here instead of each
+    loading their own copy of the weights.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the model registered under ``key``, loading it on first use
+
+        Args:
+            key (str): Unique name of the model (e.g. the hub model id)
+            loader (callable): Zero-argument function that builds the model
+
+        Returns:
+            The shared model object. Exceptions raised by ``loader`` are
+            propagated and nothing is cached, so a later call can retry.
+        """
+        if key in self._models:
+            return self._models[key]
+
+        # One lock per key: concurrent callers of the same model wait for a
+        # single load, while different models can load in parallel.
+        with self._lock_for(key):
+            if key in self._models:
+                return self._models[key]
+
+            rss_before = _current_rss_mb()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            rss_after = _current_rss_mb()
+
+            self._stats[key] = {
+                "load_seconds": round(load_seconds, 3),
+                "memory_mb": round(max(rss_after - rss_before, 0.0), 1),
+                "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._models[key] = model
+            print(f"📦 Loaded {key} in {load_seconds:.2f}s "
+                  f"(+{self._stats[key]['memory_mb']} MB)")
+            return model
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._models
+
+    def stats(self) -> Dict[str, Dict]:
+        """Load time and memory delta for every model loaded so far"""
+        return {
+            "models": {key: dict(value) for key, value in self._stats.items()},
+            "process_rss_mb": round(_current_rss_mb(), 1),
+        }
+
+    def unload(self, key: str) -> None:
+        with self._lock_for(key):
+            self._models.pop(key, None)
+            self._stats.pop(key, None)
+
+
+# Shared by app.py and telegram_bot.py
+registry = ModelRegistry()
+
+
+def get_mood_detector():
+    """
+    Return the process-wide MoodDetector without waiting for its model.
+
+    The first call starts loading the model on a background thread; until it
+    is ready, detect_mood answers with the rule-based fallback.
+    """
+    from enhanced_mood_detector import MoodDetector
+    return registry.get("mood_detector", lambda: MoodDetector(lazy=True))
+
+
+def get_reply_generator():
+    """Return the process-wide ReplyGenerator"""
+    from enhanced_mood_detector import ReplyGenerator
+    return registry.get("reply_generator", ReplyGenerator)
+
+
+def get_inference_server():
+    """Return the process-wide micro-batching server around the shared MoodDetector"""
+    from inference_server import MicroBatchServer
+    return registry.get("inference_server", lambda: MicroBatchServer(get_mood_detector()))
+
+
+def get_analysis_pipeline():
+    """Return the process-wide AnalysisPipeline (shared detector, reply generator and server)"""
+    from analysis_pipeline import AnalysisPipeline
+    return registry.get("analysis_pipeline", lambda: AnalysisPipeline(
+        get_mood_detector(), get_reply_generator(), get_inference_server()))
@@ -0,0 +1,126 @@
+# mood_cache.py
+import atexit
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from file_lock import atomic_replace
+
+# Defaults, overridable through the environment
+DEFAULT_MAX_ENTRIES = int(os.getenv("MOOD_CACHE_ENTRIES", "20000"))
+DEFAULT_MAX_BYTES = int(float(os.getenv("MOOD_CACHE_MB", "32")) * 1024 * 1024)
+
+
+def normalize_text(text: str) -> str:
+    """Cache key form of a message: Unicode NFKC with whitespace collapsed"""
+    # Case is kept on purpose: the emotion model scores "HELP" and "help" differently
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class MoodCache:
+    """
+    Bounded LRU cache of detect_mood results.
+
+    Entries are keyed on normalized text plus the model that produced them
+    and evicted least-recently-used first once either ``max_entries`` or
+    ``max_bytes`` is exceeded. Switching to another model clears the cache.
+    With ``path`` set, entries are loaded at start-up and written back on
+    exit so repeated messages stay warm across restarts.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.model_name: Optional[str] = None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            atexit.register(self.save)
+
+    def set_model(self, model_name: Optional[str]) -> None:
+        """Invalidate every entry if the serving model changed, then reload from disk"""
+        with self._lock:
+            if model_name == self.model_name:
+                return
+            self.model_name = model_name
+            self._entries.clear()
+            self._bytes = 0
+        self.load()
+
+    def get(self, text: str) -> Optional[Dict]:
+        key = normalize_text(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        result = entry[0]
+        return dict(result, raw_scores=dict(result["raw_scores"]))
+
+    def put(self, text: str, result: Dict) -> None:
+        key = normalize_text(text)
+        size = len(key.encode("utf-8")) + len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "model": self.model_name,
+        }
+
+    def save(self) -> None:
+        """Write entries for the current model to ``path`` (JSON lines)"""
+        if not self.path or self.model_name is None:
+            return
+        with self._lock:
+            items = [(key, result) for key, (result, _) in self._entries.items()]
+        with atomic_replace(self.path) as f:
+            f.write(json.dumps({"model": self.model_name}) + "\n")
+            for key, result in items:
+                f.write(json.dumps([key, result], ensure_ascii=False) + "\n")
+
+    def load(self) -> None:
+        """Warm the cache from ``path`` if it was written by the same model"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("model") != self.model_name:
+                    return
+                for line in f:
+                    key, result = json.loads(line)
+                    self.put(key, result)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Warning: could not load mood cache from {self.path}: {e}")
@@ -1,4 +1,6 @@
 # profit_utils.py
+import numpy as np
+import pandas as pd
 
 def estimate_revenue(lead_score):
     score_str = str(lead_score)
@@ -10,3 +12,11 @@ def estimate_revenue(lead_score):
         return 2000
     else:
         return 0
+
+
+def estimate_revenue_series(lead_scores: pd.Series) -> pd.Series:
+    """Vectorized estimate_revenue: evaluate each distinct score once, then broadcast"""
+    codes, uniques = pd.factorize(lead_scores)
+    # Missing values get code -1, which picks the trailing estimate for None
+    values = np.array([estimate_revenue(score) for score in uniques] + [estimate_revenue(None)])
+    return pd.Series(values[codes], index=lead_scores.index)
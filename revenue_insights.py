@@ -1,61 +1,191 @@
+import os
+import sys
+import time
+
+import numpy as np
 import pandas as pd
 
+from lead_aggregates import LEAD_TYPES, classify_lead_type
+from lead_store import LeadStore
+
 def compute_revenue_summary(csv_path: str = "lead_data.csv",
                             hot_value: int = 10000,
-                            warm_value: int = 5000,) -> dict:
+                            warm_value: int = 5000,
+                            include_dataframe: bool = True) -> dict:
     """
     Reads lead data and computes summary statistics including lead counts
     and estimated revenue. Revenue values for hot/warm leads are adjustable.
 
+    Counts come from the running aggregates maintained by LeadStore, so the
+    raw rows are only parsed when the dataframe is requested.
+
     Args:
         csv_path (str): Path to the CSV file.
         hot_value (int): Revenue per hot lead.
         warm_value (int): Revenue per warm lead.
+        include_dataframe (bool): Also load the per-lead dataframe for charts.
 
     Returns:
         dict: Summary with counts and total revenue.
     """
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
+    if not os.path.exists(csv_path):
         return {
             "hot_count": 0,
             "warm_count": 0,
             "cold_count": 0,
             "total_revenue": 0,
+            "actual_revenue": 0,
+            "projected_revenue": 0,
             "dataframe": pd.DataFrame()
         }
 
-    # Categorize lead warmth from emojis in 'Lead Score'
-    df["lead_type"] = df["Lead Score"].apply(
-        lambda score: "hot" if isinstance(score, str) and "🔥" in score
-        else "warm" if isinstance(score, str) and "🟠" in score
-        else "cold"
-    )
-
-    # Estimate revenue using editable values
-    def estimate_custom_revenue(lead_type):
-        if lead_type == "hot":
-            return hot_value
-        elif lead_type == "warm":
-            return warm_value
-        else:
-            return 0
-
-    df["estimated_revenue"] = df["lead_type"].apply(estimate_custom_revenue)
-
-    # Count leads
-    hot_count = (df["lead_type"] == "hot").sum()
-    warm_count = (df["lead_type"] == "warm").sum()
-    cold_count = (df["lead_type"] == "cold").sum()
-    total_revenue = df["estimated_revenue"].sum()
+    aggregates = LeadStore(csv_path).aggregates()
+    hot_count = aggregates.counts["hot"]
+    warm_count = aggregates.counts["warm"]
+    cold_count = aggregates.counts["cold"]
+    total_revenue = aggregates.revenue(hot_value, warm_value)
 
     return {
         "hot_count": hot_count,
         "warm_count": warm_count,
         "cold_count": cold_count,
         "total_revenue": total_revenue,
-        "actual_revenue": df["estimated_revenue"].sum(),     # same as total
+        "actual_revenue": total_revenue,     # same as total
         "projected_revenue": hot_count * hot_value + warm_count * warm_value,
-        "dataframe": df
+        "dataframe": load_lead_frame(csv_path, hot_value, warm_value) if include_dataframe else None
     }
+
+
+def load_lead_frame(csv_path: str = "lead_data.csv",
+                    hot_value: int = 10000,
+                    warm_value: int = 5000) -> pd.DataFrame:
+    """
+    Load the raw lead rows with 'lead_type' and 'estimated_revenue' columns.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+        hot_value (int): Revenue per hot lead.
+        warm_value (int): Revenue per warm lead.
+
+    Returns:
+        pd.DataFrame: One row per lead (empty if the file does not exist).
+    """
+    try:
+        df = pd.read_csv(csv_path)
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+    # Categorize lead warmth from emojis in 'Lead Score'
+    df["lead_type"] = classify_lead_types(df["Lead Score"])
+
+    # Estimate revenue using editable values
+    df["estimated_revenue"] = estimate_revenue_by_type(df["lead_type"], hot_value, warm_value)
+    return df
+
+
+def load_revenue_frame(csv_path: str = "lead_data.csv",
+                       hot_value: int = 10000,
+                       warm_value: int = 5000,
+                       start=None,
+                       end=None) -> pd.DataFrame:
+    """
+    Just what the revenue charts plot: 'timestamp', 'lead_type' and 'estimated_revenue'.
+
+    Reads the columnar lead archive (see lead_archive.py), so free-text
+    columns are never parsed and days outside [start, end] are skipped.
+
+    Args:
+        csv_path (str): Path to the CSV file the archive mirrors.
+        hot_value (int): Revenue per hot lead.
+        warm_value (int): Revenue per warm lead.
+        start, end: Optional date range (ISO strings, dates or datetimes).
+
+    Returns:
+        pd.DataFrame: One row per lead, oldest first.
+    """
+    from lead_archive import get_lead_archive
+
+    df = get_lead_archive(csv_path).read(["timestamp", "lead_type"], start, end)
+    df["lead_type"] = pd.Categorical(df["lead_type"], categories=LEAD_TYPES)
+    df["estimated_revenue"] = estimate_revenue_by_type(df["lead_type"], hot_value, warm_value)
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def classify_lead_types(scores: pd.Series) -> pd.Series:
+    """
+    Vectorized classify_lead_type for a whole 'Lead Score' column.
+
+    Lead scores take only a handful of distinct values, so each distinct
+    value is classified once and the result is broadcast through the
+    factorized codes.
+
+    Args:
+        scores (pd.Series): The 'Lead Score' column.
+
+    Returns:
+        pd.Series: Categorical series of hot/warm/cold.
+    """
+    codes, uniques = pd.factorize(scores)
+    # Missing values get code -1, which picks the trailing "cold" entry
+    type_codes = np.array(
+        [LEAD_TYPES.index(classify_lead_type(value)) for value in uniques] + [LEAD_TYPES.index("cold")],
+        dtype=np.int8
+    )[codes]
+    return pd.Series(pd.Categorical.from_codes(type_codes, categories=LEAD_TYPES), index=scores.index)
+
+
+def estimate_revenue_by_type(lead_types: pd.Series, hot_value: int = 10000, warm_value: int = 5000) -> pd.Series:
+    """Map a categorical lead_type series to revenue values in one NumPy take"""
+    values = np.array([{"hot": hot_value, "warm": warm_value}.get(lead_type, 0) for lead_type in LEAD_TYPES])
+    return pd.Series(values[lead_types.cat.codes.to_numpy()], index=lead_types.index)
+
+
+def _synthetic_lead_scores(n_rows: int) -> pd.Series:
+    rng = np.random.default_rng(42)
+    choices = np.array(["🔥 Hot", "🟠 Warm", "❄️ Cold", "🟡 Medium", None, "", "hot"], dtype=object)
+    return pd.Series(choices[rng.integers(0, len(choices), n_rows)])
+
+
+def check_classification_parity(n_rows: int = 100_000) -> bool:
+    """Compare the vectorized path with the per-row functions it replaces"""
+    from profit_utils import estimate_revenue, estimate_revenue_series
+
+    scores = _synthetic_lead_scores(n_rows)
+    expected_types = scores.apply(classify_lead_type)
+    expected_revenue = expected_types.map({"hot": 10000, "warm": 5000}).fillna(0).astype(int)
+    lead_types = classify_lead_types(scores)
+    revenue = estimate_revenue_by_type(lead_types)
+
+    types_match = (lead_types.astype(str) == expected_types).all()
+    revenue_match = (revenue == expected_revenue).all()
+    profit_match = (estimate_revenue_series(scores) == scores.apply(estimate_revenue)).all()
+
+    print(f"lead_type parity: {types_match} | estimated_revenue parity: {revenue_match} | "
+          f"profit_utils parity: {profit_match}")
+    return bool(types_match and revenue_match and profit_match)
+
+
+def benchmark_classification(n_rows: int = 1_000_000):
+    """Time per-row .apply classification against the vectorized path"""
+    scores = _synthetic_lead_scores(n_rows)
+
+    start = time.perf_counter()
+    lead_types = scores.apply(classify_lead_type)
+    lead_types.apply(lambda t: 10000 if t == "hot" else 5000 if t == "warm" else 0)
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    estimate_revenue_by_type(classify_lead_types(scores))
+    vector_seconds = time.perf_counter() - start
+
+    print(f"Lead classification benchmark ({n_rows:,} rows)")
+    print("=" * 60)
+    print(f"Row-wise .apply: {apply_seconds:.3f}s")
+    print(f"Vectorized:      {vector_seconds:.3f}s ({apply_seconds / vector_seconds:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark_classification()
+    else:
+        check_classification_parity()
@@ -0,0 +1,111 @@
+# startup_benchmark.py
+"""
+Cold-start benchmark for the Streamlit app.
+
+Imports each module app.py depends on in a fresh interpreter with
+``python -X importtime`` and reports its cumulative import time, plus
+whether importing it dragged in the heavy ML stack (torch/transformers).
+With --model it also times how long MoodDetector(lazy=True) takes to
+return and how long the background model load takes to become ready.
+
+Usage:
+    python startup_benchmark.py [--model]
+"""
+import json
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+# What app.py imports at start-up, then the ML stack it should no longer pull in
+APP_MODULES = [
+    "streamlit", "pandas", "plotly.express", "gtts",
+    "model_registry", "enhanced_mood_detector", "lead_utils", "lead_store",
+    "revenue_insights", "auth", "daily_trending_sales", "telegram_bot",
+]
+REFERENCE_MODULES = ["torch", "transformers"]
+HEAVY_MODULES = ("torch", "transformers")
+
+
+def measure_import(module: str) -> Dict:
+    """
+    Import one module in a fresh interpreter and parse ``-X importtime`` output
+
+    Returns:
+        dict: cumulative_ms (None if the import failed), wall_ms, heavy
+        modules it loaded, and the error line on failure.
+    """
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    if proc.returncode != 0:
+        error = next((line for line in reversed(proc.stderr.splitlines())
+                      if line and not line.startswith("import time:")), "import failed")
+        return {"cumulative_ms": None, "wall_ms": round(wall_ms, 1), "heavy": [], "error": error}
+
+    # Lines look like "import time:   self [us] | cumulative | imported package";
+    # the un-indented entry for the module itself carries its total
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == f" {module}":
+            cumulative_us = int(parts[1])
+    return {
+        "cumulative_ms": round(cumulative_us / 1000, 1) if cumulative_us is not None else None,
+        "wall_ms": round(wall_ms, 1),
+        "heavy": json.loads(proc.stdout.strip().splitlines()[-1] or "[]"),
+        "error": None,
+    }
+
+
+def measure_model_ready(timeout: Optional[float] = None) -> Dict:
+    """Time a lazy MoodDetector: constructor return, then background load until ready"""
+    from enhanced_mood_detector import MoodDetector
+
+    start = time.perf_counter()
+    detector = MoodDetector(lazy=True)
+    constructed = time.perf_counter()
+    first_source = "model" if detector.emotion_pipeline is not None else "rule-based"
+    detector.detect_mood("Hi, can you tell me about your pricing?")  # served while loading
+    ready = detector.wait_until_ready(timeout)
+    finished = time.perf_counter()
+    return {
+        "constructor_ms": round((constructed - start) * 1000, 1),
+        "first_answer_source": first_source,
+        "ready": ready,
+        "ready_after_s": round(finished - start, 2),
+        "model": detector.model_name,
+        "backend": detector.backend,
+    }
+
+
+def run_startup_benchmark(modules: List[str] = APP_MODULES + REFERENCE_MODULES, model: bool = False) -> Dict:
+    report = {module: measure_import(module) for module in modules}
+
+    print("Startup import times (fresh interpreter per module)")
+    print("=" * 60)
+    for module, row in report.items():
+        if row["error"]:
+            print(f"{module:>24}: not importable ({row['error']})")
+            continue
+        heavy = f" ⚠️ loads {', '.join(row['heavy'])}" if row["heavy"] and module not in HEAVY_MODULES else ""
+        print(f"{module:>24}: {row['cumulative_ms']:>8} ms import | {row['wall_ms']:>8} ms process{heavy}")
+
+    if model:
+        ready = measure_model_ready()
+        report["model_ready"] = ready
+        print("-" * 60)
+        print(f"MoodDetector(lazy=True) returned in {ready['constructor_ms']} ms "
+              f"(first answer: {ready['first_answer_source']})")
+        print(f"Model {ready['model']} ({ready['backend']}) ready after {ready['ready_after_s']}s")
+    return report
+
+
+if __name__ == "__main__":
+    run_startup_benchmark(model="--model" in sys.argv)
@@ -3,20 +3,41 @@ import os
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ContextTypes
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-BOT_TOKEN = st.secrets["TELEGRAM_BOT_TOKEN"]
+
+
+def get_bot_token():
+    """Read the bot token from the environment, falling back to Streamlit secrets"""
+    return os.getenv("TELEGRAM_BOT_TOKEN") or st.secrets["TELEGRAM_BOT_TOKEN"]
 
 
 # Import mood detection and reply generation
-from enhanced_mood_detector import MoodDetector, ReplyGenerator
+from model_registry import get_mood_detector, get_analysis_pipeline
+from conversation_store import ConversationStore
+
+# AI components are shared with the Streamlit app and fetched from the registry
+# on use, so importing this module never loads a model
+
+# Inference runs on a bounded thread pool so the event loop keeps polling
+INFERENCE_WORKERS = int(os.getenv("BOT_INFERENCE_WORKERS", "16"))
+MAX_CONCURRENT_REPLIES = int(os.getenv("BOT_MAX_CONCURRENT_REPLIES", "32"))
+BACKPRESSURE_TIMEOUT = float(os.getenv("BOT_BACKPRESSURE_TIMEOUT", "10"))  # seconds
+BUSY_MESSAGE = "⏳ I'm helping a lot of customers right now. Please try again in a moment!"
 
-# Initialize AI components
-mood_detector = MoodDetector()
-reply_generator = ReplyGenerator()
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="bot-inference")
+_reply_slots = None  # asyncio.Semaphore, created lazily on the bot's event loop
 
-# Conversation history per user (chat_id)
-user_histories = {}
+# Conversation history per user (chat_id), bounded and evicted by LRU/TTL
 MAX_HISTORY = 5  # Max messages per user
+MAX_CHATS = int(os.getenv("BOT_MAX_CHATS", "10000"))
+HISTORY_TTL = float(os.getenv("BOT_HISTORY_TTL", str(24 * 3600)))  # seconds
+user_histories = ConversationStore(
+    max_chats=MAX_CHATS,
+    max_history=MAX_HISTORY,
+    ttl_seconds=HISTORY_TTL,
+    sqlite_path=os.getenv("BOT_HISTORY_DB")  # e.g. "bot_history.db" to survive restarts
+)
 
 # Handle /start command
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -27,22 +48,24 @@ async def reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     user_text = update.message.text.strip()
 
-    if chat_id not in user_histories:
-        user_histories[chat_id] = []
+    history = user_histories.append(chat_id, user_text)
+    conversation_context = "\n".join(history)
 
-    user_histories[chat_id].append(user_text)
-    user_histories[chat_id] = user_histories[chat_id][-MAX_HISTORY:]
-    conversation_context = "\n".join(user_histories[chat_id])
+    # Backpressure: wait for a free slot, but don't queue messages forever
+    slots = _get_reply_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=BACKPRESSURE_TIMEOUT)
+    except asyncio.TimeoutError:
+        await update.message.reply_text(BUSY_MESSAGE)
+        return
 
-    # Mood detection
-    mood_result = mood_detector.detect_mood(user_text)
-    mood = mood_result["mood"]
-    label = mood_result["label"]
-    intensity = mood_detector.analyze_sentiment_intensity(user_text)
-    category = mood_detector.get_mood_category(label)
-
-    # Generate reply
-    smart_reply = reply_generator.generate_reply(user_text, category, intensity)
+    try:
+        loop = asyncio.get_running_loop()
+        mood, intensity, smart_reply = await loop.run_in_executor(
+            inference_executor, analyze_message, user_text
+        )
+    finally:
+        slots.release()
 
     final_message = (
         f"🤖 Mood: {mood} (Intensity: {intensity})\n"
@@ -50,10 +73,23 @@ async def reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     await update.message.reply_text(final_message)
 
+def _get_reply_slots():
+    global _reply_slots
+    if _reply_slots is None:
+        _reply_slots = asyncio.Semaphore(MAX_CONCURRENT_REPLIES)
+    return _reply_slots
+
+def analyze_message(user_text: str):
+    """Blocking mood detection and reply generation, run on inference_executor"""
+    # Same single-pass analysis as the dashboard (rule-based mood until the model loaded)
+    result = get_analysis_pipeline().analyze(user_text)
+    return result.mood, result.intensity, result.reply
+
 # Start the bot
 def start_bot():
+    get_mood_detector()  # start loading the model in the background
     asyncio.set_event_loop(asyncio.new_event_loop())
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    app = ApplicationBuilder().token(get_bot_token()).build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, reply))
     print("✅ Telegram bot is running...")
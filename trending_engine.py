@@ -0,0 +1,258 @@
+# trending_engine.py
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+from daily_trending_sales import SECTOR_KEYWORDS, _SECTOR_MATCHER
+from file_lock import atomic_replace
+
+BUCKET_SECONDS = 3600  # one bucket per hour
+RETENTION_SECONDS = 8 * 24 * 3600  # a 7d baseline plus the current day
+WINDOWS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+TRENDING_HISTORY_PATH = os.getenv("TRENDING_HISTORY_PATH")  # e.g. "trending_history.json"
+
+
+def _seconds(window: Union[str, float]) -> float:
+    return WINDOWS[window] if isinstance(window, str) else float(window)
+
+
+def _headline_time(headline: Dict, default: float) -> float:
+    """Publish time of a headline (news_ingestion dicts carry one), else ``default``"""
+    published = headline.get("published")
+    if isinstance(published, datetime):
+        return published.timestamp()
+    if isinstance(published, (int, float)):
+        return float(published)
+    return default
+
+
+class TrendingEngine:
+    """
+    Rolling, time-bucketed sector mention counts over the headline history.
+
+    Each headline is tokenized once when it is added and its whole-word
+    sector keyword counts are added to the hourly bucket of its publish time.
+    Window and rising-vs-baseline queries only sum bucket counters, so they
+    never rescan headline text. Links already counted are ignored, so the
+    same headline list can be fed in on every refresh.
+
+    Example:
+        engine = TrendingEngine()
+        engine.add_headlines(headlines)
+        engine.trending("24h")["trending_sector"]
+        engine.rising("24h", baseline="7d")
+    """
+
+    def __init__(self, bucket_seconds: int = BUCKET_SECONDS, retention_seconds: int = RETENTION_SECONDS,
+                 path: Optional[str] = None):
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self.path = path
+        self._buckets: Dict[int, Counter] = {}  # bucket start -> sector mention counts
+        self._headline_counts: Counter = Counter()  # bucket start -> headlines added
+        self._seen: Dict[str, int] = {}  # link -> bucket it was counted in
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def _bucket_for(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds * self.bucket_seconds)
+
+    def add_headlines(self, headlines: Iterable[Dict], now: Optional[float] = None) -> int:
+        """Count new headlines into their buckets; returns how many were new"""
+        now = time.time() if now is None else now
+        added = 0
+        with self._lock:
+            for headline in headlines:
+                link = headline.get("link") or headline["title"]
+                if link in self._seen:
+                    continue
+                timestamp = _headline_time(headline, now)
+                if now - timestamp > self.retention_seconds:
+                    continue
+                bucket = self._bucket_for(timestamp)
+                self._seen[link] = bucket
+                self._headline_counts[bucket] += 1
+                self._buckets.setdefault(bucket, Counter()).update(_SECTOR_MATCHER.count_groups(headline["title"]))
+                added += 1
+            self._prune(now)
+        return added
+
+    def _prune(self, now: float) -> None:
+        oldest = self._bucket_for(now - self.retention_seconds)
+        for bucket in [b for b in self._buckets if b < oldest]:
+            del self._buckets[bucket]
+        for bucket in [b for b in self._headline_counts if b < oldest]:
+            del self._headline_counts[bucket]
+        for link in [link for link, bucket in self._seen.items() if bucket < oldest]:
+            del self._seen[link]
+
+    def counts(self, start: float, end: float) -> Counter:
+        """Sector mentions in buckets starting within [start, end)"""
+        first, last = self._bucket_for(start), self._bucket_for(end)
+        totals = Counter()
+        with self._lock:
+            for bucket, counts in self._buckets.items():
+                if first <= bucket <= last and bucket < end:
+                    totals.update(counts)
+        return totals
+
+    def trending(self, window: Union[str, float] = "24h", now: Optional[float] = None) -> Dict:
+        """
+        Sector activity over the last ``window`` ("1h", "24h", "7d" or seconds)
+
+        Windows are aligned to whole buckets, so "1h" covers the current and
+        the previous hourly bucket.
+
+        Returns:
+            dict: Same keys as DailyTrendingSales.get_trending_analysis, plus
+            the number of headlines in the window.
+        """
+        now = time.time() if now is None else now
+        start = now - _seconds(window)
+        scores = self.counts(start, now + 1)
+        with self._lock:
+            headlines = sum(n for b, n in self._headline_counts.items() if self._bucket_for(start) <= b <= now)
+        if not scores:
+            return {"trending_sector": "General Business", "all_scores": {"General Business": 1},
+                    "total_mentions": 1, "headlines": headlines}
+        ordered = {sector: scores[sector] for sector in SECTOR_KEYWORDS if scores[sector]}
+        return {
+            "trending_sector": max(ordered, key=ordered.get),
+            "all_scores": ordered,
+            "total_mentions": sum(ordered.values()),
+            "headlines": headlines,
+        }
+
+    def rising(self, window: Union[str, float] = "24h", baseline: Union[str, float] = "7d",
+               now: Optional[float] = None, min_mentions: int = 2) -> List[Dict]:
+        """
+        Sectors mentioned more often in ``window`` than over the preceding ``baseline``
+
+        Rates are mentions per hour; the baseline rate gets +1 smoothing so a
+        sector that is new this window does not divide by zero.
+
+        Returns:
+            list: Dicts with sector, recent mentions, recent/baseline rate per
+            hour and ratio, strongest riser first.
+        """
+        now = time.time() if now is None else now
+        window_seconds, baseline_seconds = _seconds(window), _seconds(baseline)
+        recent = self.counts(now - window_seconds, now + 1)
+        # The baseline ends where the window's first bucket starts, so no bucket counts twice
+        window_start = self._bucket_for(now - window_seconds)
+        before = self.counts(window_start - baseline_seconds, window_start)
+
+        rising = []
+        for sector, mentions in recent.items():
+            if mentions < min_mentions:
+                continue
+            recent_rate = mentions / (window_seconds / 3600)
+            baseline_rate = (before[sector] + 1) / (baseline_seconds / 3600)
+            ratio = recent_rate / baseline_rate
+            if ratio > 1:
+                rising.append({
+                    "sector": sector,
+                    "recent_mentions": mentions,
+                    "recent_per_hour": round(recent_rate, 3),
+                    "baseline_per_hour": round(before[sector] / (baseline_seconds / 3600), 3),
+                    "ratio": round(ratio, 2),
+                })
+        return sorted(rising, key=lambda row: row["ratio"], reverse=True)
+
+    def save(self) -> None:
+        """Write the bucket history to ``path`` (JSON)"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "bucket_seconds": self.bucket_seconds,
+                "buckets": {str(b): dict(c) for b, c in self._buckets.items()},
+                "headlines": {str(b): n for b, n in self._headline_counts.items()},
+                "seen": self._seen,
+            }
+        with atomic_replace(self.path) as f:
+            json.dump(data, f)
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("bucket_seconds") != self.bucket_seconds:
+                return
+            with self._lock:
+                self._buckets = {int(b): Counter(c) for b, c in data["buckets"].items()}
+                self._headline_counts = Counter({int(b): n for b, n in data["headlines"].items()})
+                self._seen = dict(data["seen"])
+                self._prune(time.time())
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Warning: could not load trending history from {self.path}: {e}")
+
+
+_shared_engine: Optional[TrendingEngine] = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_trending_engine() -> TrendingEngine:
+    """Return the process-wide TrendingEngine (persisted to TRENDING_HISTORY_PATH if set)"""
+    global _shared_engine
+    if _shared_engine is None:
+        with _shared_engine_lock:
+            if _shared_engine is None:
+                _shared_engine = TrendingEngine(path=TRENDING_HISTORY_PATH)
+    return _shared_engine
+
+
+def benchmark_trending(n_headlines: int = 20000, queries: int = 200):
+    """Compare window queries on the engine with rescanning raw headline text"""
+    import random
+
+    rng = random.Random(7)
+    words = [w for keywords in SECTOR_KEYWORDS.values() for w in keywords] + \
+        ["said", "market", "shares", "quarter", "growth", "plans", "report", "deal"] * 6
+    now = time.time()
+    headlines = [{
+        "title": " ".join(rng.choice(words) for _ in range(10)),
+        "link": f"https://example.com/{i}",
+        "published": now - rng.uniform(0, 7 * 24 * 3600),
+    } for i in range(n_headlines)]
+
+    engine = TrendingEngine()
+    start = time.perf_counter()
+    engine.add_headlines(headlines, now=now)
+    ingest_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        engine.trending("24h", now=now)
+        engine.rising("24h", "7d", now=now)
+    engine_ms = (time.perf_counter() - start) * 1000 / queries
+
+    def rescan(window):
+        recent = [h["title"] for h in headlines if now - h["published"] <= WINDOWS[window]]
+        return _SECTOR_MATCHER.count_groups(" ".join(recent))
+
+    rescan_queries = max(1, queries // 20)
+    start = time.perf_counter()
+    for _ in range(rescan_queries):
+        rescan("24h")
+        rescan("7d")
+    rescan_ms = (time.perf_counter() - start) * 1000 / rescan_queries
+
+    print(f"Trending engine benchmark ({n_headlines:,} headlines over 7 days)")
+    print("=" * 60)
+    print(f"Incremental ingest: {ingest_seconds * 1e6 / n_headlines:.1f} µs/headline")
+    print(f"Engine 24h trending + rising query: {engine_ms:.2f} ms")
+    print(f"Rescanning raw text for 24h + 7d:   {rescan_ms:.2f} ms")
+    print(f"Top 24h sector: {engine.trending('24h', now=now)['trending_sector']} | "
+          f"rising: {[row['sector'] for row in engine.rising(now=now)][:3]}")
+
+
+if __name__ == "__main__":
+    benchmark_trending()
@@ -0,0 +1,296 @@
+# tts_service.py
+"""
+Text-to-speech with in-memory synthesis and a shared on-disk audio cache.
+
+Audio is synthesized straight into memory (no shared temp files, so
+concurrent sessions cannot overwrite each other's audio) and cached on disk
+under the SHA-256 of backend, language and text. Identical replies and
+summaries are therefore synthesized only once per process and survive
+restarts. The cache is trimmed least-recently-used first once it grows past
+TTS_CACHE_MB.
+
+Set TTS_BACKEND=offline to use a network-free stub that returns silent MP3
+audio; ``python tts_service.py`` runs a self-test with it.
+"""
+import base64
+import hashlib
+import io
+import os
+import sys
+import threading
+from typing import Dict, Optional
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")  # "gtts" or "offline"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+TTS_CACHE_MAX_BYTES = int(float(os.getenv("TTS_CACHE_MB", "64")) * 1024 * 1024)
+TTS_LANG = os.getenv("TTS_LANG", "en")
+
+
+class GTTSBackend:
+    """Google Translate TTS via gTTS, written to a BytesIO instead of a file"""
+    name = "gtts"
+
+    def __init__(self, lang: str = TTS_LANG):
+        self.lang = lang
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=self.lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class OfflineBackend:
+    """
+    Network-free stand-in: silent MP3 whose length follows the text.
+
+    Each frame is a valid MPEG-1 Layer III frame (128 kbps, 44.1 kHz,
+    ~26 ms), so browsers play it as silence. ``calls`` counts syntheses.
+    """
+    name = "offline"
+    _FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+    _FRAMES_PER_WORD = 12  # ~0.3 s of audio per word
+
+    def __init__(self, lang: str = TTS_LANG):
+        self.lang = lang
+        self.calls = 0
+
+    def synthesize(self, text: str) -> bytes:
+        self.calls += 1
+        return self._FRAME * max(1, len(text.split()) * self._FRAMES_PER_WORD)
+
+
+BACKENDS = {"gtts": GTTSBackend, "offline": OfflineBackend}
+
+
+class TTSService:
+    """
+    Cached speech synthesis shared by every session.
+
+    Concurrent requests for the same text wait on one synthesis instead of
+    each calling the backend.
+    """
+
+    def __init__(self, backend=None, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.backend = backend or BACKENDS[TTS_BACKEND]()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # text key -> [lock, callers holding or waiting for it]; removed when the count drops to zero
+        self._key_locks: Dict[str, list] = {}
+        self._bytes = sum(
+            os.path.getsize(os.path.join(cache_dir, name))
+            for name in os.listdir(cache_dir) if name.endswith(".mp3")
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cache_key(self, text: str) -> str:
+        key = f"{self.backend.name}\0{self.backend.lang}\0{text}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def synthesize(self, text: str) -> bytes:
+        """MP3 bytes for ``text``, from the disk cache when it was spoken before"""
+        key = self.cache_key(text)
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                audio = self._read(key)
+                if audio is not None:
+                    with self._lock:
+                        self.hits += 1
+                    return audio
+
+                audio = self.backend.synthesize(text)
+                self._write(key, audio)
+                with self._lock:
+                    self.misses += 1
+                return audio
+        finally:
+            # The last caller out drops the entry, also after a failed synthesis;
+            # while anyone still waits, later callers keep sharing the same lock
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mtime doubles as last-used time for eviction
+            return audio
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, audio: bytes) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        with self._lock:
+            # Another process may have written the same key; count only the difference
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._bytes += len(audio) - replaced
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits (caller holds _lock)"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".mp3"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        self._bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self._bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
+
+
+def audio_html(audio_bytes: bytes, autoplay: bool = True) -> str:
+    """An inline <audio> element playing the given MP3 bytes"""
+    b64 = base64.b64encode(audio_bytes).decode()
+    return f"""
+    <audio controls {'autoplay' if autoplay else ''}>
+        <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
+    </audio>
+    """
+
+
+_shared_service: Optional[TTSService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_tts_service() -> TTSService:
+    """Return the process-wide TTSService"""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = TTSService()
+    return _shared_service
+
+
+def run_self_test() -> bool:
+    """Check caching, concurrency and eviction with the offline backend"""
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        backend = OfflineBackend()
+        service = TTSService(backend, cache_dir, max_bytes=200 * 1024)
+        reply = "Customer mood detected as happy with 91% confidence. Great to hear from you!"
+
+        first = service.synthesize(reply)
+        second = service.synthesize(reply)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            concurrent = list(pool.map(service.synthesize, ["Same summary for everyone"] * 16))
+        calls_before_restart = backend.calls
+
+        # A new service on the same directory (e.g. after a restart) reuses the files
+        restarted = TTSService(backend, cache_dir, max_bytes=200 * 1024)
+        restarted.synthesize(reply)
+        restart_hit = restarted.hits == 1 and backend.calls == calls_before_restart
+
+        for i in range(40):
+            restarted.synthesize(f"Distinct summary number {i} about weekly pipeline revenue")
+        on_disk = sum(os.path.getsize(os.path.join(cache_dir, n)) for n in os.listdir(cache_dir))
+
+        # Rewriting a cached key (another process got there first) must not count it twice
+        key = restarted.cache_key("Distinct summary number 39 about weekly pipeline revenue")
+        restarted._write(key, restarted._read(key))
+        recount = TTSService(backend, cache_dir, max_bytes=200 * 1024)._bytes
+
+        class FailingBackend(OfflineBackend):
+            def synthesize(self, text):
+                raise RuntimeError("backend down")
+
+        failing = TTSService(FailingBackend(), cache_dir)
+        try:
+            failing.synthesize("Never cached")
+        except RuntimeError:
+            pass
+
+        class FlakyBackend(OfflineBackend):
+            """Slow, and fails its first call"""
+
+            def synthesize(self, text):
+                time.sleep(0.05)
+                if self.calls == 0:
+                    self.calls += 1
+                    raise RuntimeError("transient error")
+                return super().synthesize(text)
+
+        # Callers arriving while the failed synthesis' waiters retry must still share one lock
+        flaky_backend = FlakyBackend()
+        flaky = TTSService(flaky_backend, cache_dir)
+
+        def staggered(delay):
+            time.sleep(delay)
+            try:
+                return flaky.synthesize("Retried after a transient error")
+            except RuntimeError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(staggered, [i * 0.015 for i in range(8)]))
+
+        checks = {
+            "audio is an MP3 frame stream": first[:2] == b"\xff\xfb",
+            "repeated text served from cache": first == second and service.hits >= 1,
+            "concurrent identical requests synthesized once": calls_before_restart == 2 and len(set(concurrent)) == 1,
+            "cache survives a restart": restart_hit,
+            "eviction keeps the cache under its size limit": on_disk <= 200 * 1024 and restarted.evictions > 0,
+            "overwritten file counted once": restarted._bytes == recount,
+            "failed synthesis releases its key lock": not failing._key_locks,
+            "retry after a failure synthesized once": flaky_backend.calls == 2 and not flaky._key_locks,
+        }
+
+    print(f"TTS self-test ({restarted.stats()})")
+    print("=" * 60)
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_self_test() else 1)